@@ -1,6 +1,30 @@
-from typing import NamedTuple, List, Any, Tuple
+import json
+import mmap
+import os
+import sys
+import weakref
+from array import array
+from bisect import bisect_left
+from typing import (
+    NamedTuple,
+    List,
+    Any,
+    Tuple,
+    Iterator,
+    Optional,
+    Iterable,
+    MutableSequence,
+    Callable,
+    TypeVar,
+)
+
+from src.lazy_pytest import pytest
 
-import pytest
+DIGIT_VALUES = bytes.maketrans(b"0123456789", bytes(range(10)))
+ORTHOGONAL_OFFSETS = ((0, -1), (-1, 0), (1, 0), (0, 1))
+ALL_OFFSETS = tuple(
+    (dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if (dx, dy) != (0, 0)
+)
 
 
 @pytest.mark.parametrize(
@@ -14,17 +38,253 @@ def test_parse_digit_matrix(text, expected):
     assert parse_digit_matrix(text) == expected
 
 
+class DigitGrid:
+    # One byte per cell, row-major, so cell (x, y) lives at cells[y * width + x]
+    __slots__ = ("cells", "width", "height")
+
+    def __init__(self, cells: bytes, width: int, height: int):
+        if len(cells) != width * height:
+            raise ValueError(f"{len(cells)} cells do not fill a {width}x{height} grid")
+        self.cells = cells
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "DigitGrid":
+        rows = raw.split()
+        if not rows:
+            return cls(b"", 0, 0)
+        width = len(rows[0])
+        if any(len(row) != width for row in rows):
+            raise ValueError("Digit grid rows must all be the same length")
+        return cls(b"".join(rows).translate(DIGIT_VALUES), width, len(rows))
+
+    @classmethod
+    def from_string(cls, input_string: str) -> "DigitGrid":
+        return cls.from_bytes(input_string.encode())
+
+    def __getitem__(self, point: Tuple[int, int]) -> int:
+        x, y = point
+        if not self.in_bounds(x, y):
+            raise IndexError(f"({x}, {y}) is outside a {self.width}x{self.height} grid")
+        return self.cells[y * self.width + x]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DigitGrid) and (
+            self.cells,
+            self.width,
+            self.height,
+        ) == (other.cells, other.width, other.height)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def row(self, y: int) -> bytes:
+        return self.cells[y * self.width : (y + 1) * self.width]
+
+    def column(self, x: int) -> bytes:
+        return self.cells[x :: self.width]
+
+    def rows(self) -> Iterator[bytes]:
+        return (self.row(y) for y in range(self.height))
+
+    def columns(self) -> Iterator[bytes]:
+        return (self.column(x) for x in range(self.width))
+
+    def transposed(self) -> "DigitGrid":
+        return DigitGrid(b"".join(self.columns()), self.height, self.width)
+
+    def neighbors(
+        self, x: int, y: int, diagonals: bool = False
+    ) -> List[Tuple[int, int]]:
+        offsets = ALL_OFFSETS if diagonals else ORTHOGONAL_OFFSETS
+        return [
+            (x + dx, y + dy) for dx, dy in offsets if self.in_bounds(x + dx, y + dy)
+        ]
+
+    def to_lists(self, transposed: bool = True) -> List[List[int]]:
+        # Transposed matches parse_digit_matrix: matrix[x][y]
+        return [list(line) for line in (self.columns() if transposed else self.rows())]
+
+    def to_tuples(self, transposed: bool = True) -> Tuple[Tuple[int, ...], ...]:
+        return tuple(
+            tuple(line) for line in (self.columns() if transposed else self.rows())
+        )
+
+
+@pytest.mark.parametrize(
+    "text, width, height, cells",
+    [
+        ("", 0, 0, b""),
+        ("7", 1, 1, bytes([7])),
+        ("123\n456\n", 3, 2, bytes([1, 2, 3, 4, 5, 6])),
+        ("  12\r\n34  ", 2, 2, bytes([1, 2, 3, 4])),
+    ],
+)
+def test_digit_grid_from_string(text, width, height, cells):
+    assert DigitGrid.from_string(text) == DigitGrid(cells, width, height)
+
+
+def test_digit_grid_rejects_ragged_rows():
+    with pytest.raises(ValueError):
+        DigitGrid.from_string("123\n45")
+
+
+def test_digit_grid_views():
+    grid = DigitGrid.from_string("123\n456")
+    assert grid[2, 0] == 3
+    assert grid[0, 1] == 4
+    assert grid.to_lists() == [[1, 4], [2, 5], [3, 6]]
+    assert grid.to_lists(transposed=False) == [[1, 2, 3], [4, 5, 6]]
+    assert grid.to_tuples() == ((1, 4), (2, 5), (3, 6))
+    assert grid.transposed().to_lists(transposed=False) == grid.to_lists()
+    with pytest.raises(IndexError):
+        grid[3, 0]
+
+
+@pytest.mark.parametrize(
+    "x, y, diagonals, expected",
+    [
+        (0, 0, False, [(1, 0), (0, 1)]),
+        (1, 1, False, [(1, 0), (0, 1), (2, 1), (1, 2)]),
+        (2, 2, False, [(2, 1), (1, 2)]),
+        (0, 0, True, [(1, 0), (0, 1), (1, 1)]),
+        (1, 1, True, [(0, 0), (1, 0), (2, 0), (0, 1), (2, 1), (0, 2), (1, 2), (2, 2)]),
+    ],
+)
+def test_digit_grid_neighbors(x, y, diagonals, expected):
+    grid = DigitGrid.from_string("123\n456\n789")
+    assert grid.neighbors(x, y, diagonals=diagonals) == expected
+
+
+class GridAdjacency:
+    # Neighbours of every cell of a width x height grid as row-major flat indices,
+    # stored CSR-style: cell i's neighbours are targets[starts[i] : starts[i + 1]]
+    __slots__ = ("width", "height", "offsets", "starts", "targets")
+
+    def __init__(self, width: int, height: int, diagonals: bool = False):
+        self.width = width
+        self.height = height
+        self.offsets = ALL_OFFSETS if diagonals else ORTHOGONAL_OFFSETS
+        self.starts = array("I", [0])
+        self.targets = array("I")
+        for y in range(height):
+            row_steps = [
+                (dx, dy * width + dx) for dx, dy in self.offsets if 0 <= y + dy < height
+            ]
+            for x in range(width):
+                index = y * width + x
+                self.targets.extend(
+                    index + step for dx, step in row_steps if 0 <= x + dx < width
+                )
+                self.starts.append(len(self.targets))
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def point(self, index: int) -> Tuple[int, int]:
+        y, x = divmod(index, self.width)
+        return x, y
+
+    def neighbors(self, index: int) -> array:
+        return self.targets[self.starts[index] : self.starts[index + 1]]
+
+    def padded(self, cells: bytes, fill: int) -> bytes:
+        # A one-cell border of fill round the grid, so a stencil can read
+        # padded[i + step] for every step in padded_steps() without bounds checks
+        border = bytes([fill])
+        edge = border * (self.width + 2)
+        rows = (
+            border + cells[y * self.width : (y + 1) * self.width] + border
+            for y in range(self.height)
+        )
+        return edge + b"".join(rows) + edge
+
+    def padded_steps(self) -> Tuple[int, ...]:
+        return tuple(dy * (self.width + 2) + dx for dx, dy in self.offsets)
+
+    def padded_index(self, index: int) -> int:
+        y, x = divmod(index, self.width)
+        return (y + 1) * (self.width + 2) + x + 1
+
+    def gather(self, cells: bytes, fill: int) -> List[bytes]:
+        # One shifted copy of the grid per direction: gather(...)[k][i] is the value
+        # of cell i's k-th neighbour, or fill where that falls off the grid
+        padded = self.padded(cells, fill)
+        padded_width = self.width + 2
+        row_starts = [(y + 1) * padded_width + 1 for y in range(self.height)]
+        return [
+            b"".join(
+                padded[start + step : start + step + self.width] for start in row_starts
+            )
+            for step in self.padded_steps()
+        ]
+
+    def scatter_add(
+        self,
+        values: MutableSequence[int],
+        sources: Iterable[int],
+        amount: int = 1,
+        limit: Optional[int] = None,
+    ) -> List[int]:
+        # Adds amount to every neighbour of every source in place and returns the
+        # cells this pushed from at most limit to above it
+        starts = self.starts
+        targets = self.targets
+        crossed = []
+        for source in sources:
+            for target in targets[starts[source] : starts[source + 1]]:
+                before = values[target]
+                values[target] = before + amount
+                if limit is not None and before <= limit < before + amount:
+                    crossed.append(target)
+        return crossed
+
+
+@pytest.mark.parametrize("diagonals", [False, True])
+@pytest.mark.parametrize("width, height", [(1, 1), (3, 3), (4, 2), (1, 5)])
+def test_grid_adjacency_matches_digit_grid_neighbors(width, height, diagonals):
+    grid = DigitGrid(bytes(width * height), width, height)
+    adjacency = GridAdjacency(width, height, diagonals=diagonals)
+    assert len(adjacency) == width * height
+    for y in range(height):
+        for x in range(width):
+            index = adjacency.index(x, y)
+            assert adjacency.point(index) == (x, y)
+            assert [adjacency.point(i) for i in adjacency.neighbors(index)] == (
+                grid.neighbors(x, y, diagonals=diagonals)
+            )
+
+
+def test_grid_adjacency_gather():
+    grid = DigitGrid.from_string("123\n456")
+    adjacency = GridAdjacency(grid.width, grid.height)
+    up, left, right, down = adjacency.gather(grid.cells, fill=0)
+    assert list(up) == [0, 0, 0, 1, 2, 3]
+    assert list(left) == [0, 1, 2, 0, 4, 5]
+    assert list(right) == [2, 3, 0, 5, 6, 0]
+    assert list(down) == [4, 5, 6, 0, 0, 0]
+    padded = adjacency.padded(grid.cells, fill=9)
+    assert len(padded) == 5 * 4
+    steps = adjacency.padded_steps()
+    assert [padded[adjacency.padded_index(4) + step] for step in steps] == [2, 4, 6, 9]
+
+
+def test_grid_adjacency_scatter_add():
+    adjacency = GridAdjacency(3, 1)
+    values = [9, 5, 8]
+    assert adjacency.scatter_add(values, [0, 2], limit=5) == [1]
+    assert values == [9, 7, 8]
+    assert adjacency.scatter_add(values, [1], amount=2, limit=9) == [0, 2]
+    assert values == [11, 7, 10]
+    assert adjacency.scatter_add(values, [1], limit=9) == []
+
+
 def parse_digit_matrix(input_string: str) -> List[List[int]]:
-    if not input_string:
-        return []
-    result_transposed = []
-    for line in input_string.strip().split("\n"):
-        result_transposed.append([int(char) for char in line.strip()])
-    result = [[0] * len(result_transposed) for _ in result_transposed[0]]
-    for x in range(len(result)):
-        for y in range(len(result[0])):
-            result[x][y] = result_transposed[y][x]
-    return result
+    return DigitGrid.from_string(input_string).to_lists()
 
 
 @pytest.mark.parametrize(
@@ -52,3 +312,517 @@ class Point(NamedTuple):
     def from_string(cls, input_string: str) -> "Point":
         [x, y] = [int(a) for a in input_string.split(",")]
         return cls(x, y)
+
+
+T = TypeVar("T")
+
+
+@pytest.mark.parametrize(
+    "input_string, expected",
+    [
+        ("", [""]),
+        ("a", ["a"]),
+        ("a\n", ["a", ""]),
+        ("a\n\nb", ["a", "", "b"]),
+    ],
+)
+def test_iter_lines(input_string, expected):
+    assert list(iter_lines(input_string)) == expected
+
+
+def iter_lines(input_string: str) -> Iterator[str]:
+    # Like str.split("\n"), without building the whole list up front
+    start = 0
+    while True:
+        end = input_string.find("\n", start)
+        if end == -1:
+            yield input_string[start:]
+            return
+        yield input_string[start:end]
+        start = end + 1
+
+
+def decode_int(line: str) -> int:
+    return int(line)
+
+
+def decode_word_int(line: str) -> Tuple[str, int]:
+    [word, number] = line.split()
+    return word, int(number)
+
+
+def decode_segment(line: str) -> Tuple[Point, Point]:
+    [start, end] = line.split(" -> ")
+    return Point.from_string(start), Point.from_string(end)
+
+
+def decode_link(line: str) -> Tuple[str, str]:
+    [start, end] = line.split("-")
+    return start, end
+
+
+def decode_digits(line: str) -> Tuple[int, ...]:
+    return tuple(line.encode().translate(DIGIT_VALUES))
+
+
+def decode_json(line: str) -> Any:
+    return json.loads(line)
+
+
+@pytest.mark.parametrize(
+    "lines, decoder, expected",
+    [
+        ([], decode_int, []),
+        (["1", " 22 ", "", "-3"], decode_int, [1, 22, -3]),
+        (["forward 5", "up 3"], decode_word_int, [("forward", 5), ("up", 3)]),
+        (["0,9 -> 5,9"], decode_segment, [(Point(0, 9), Point(5, 9))]),
+        (["start-A", "b-end"], decode_link, [("start", "A"), ("b", "end")]),
+        (["0110", "1001\r"], decode_digits, [(0, 1, 1, 0), (1, 0, 0, 1)]),
+        (["[[1,2],3]", "4"], decode_json, [[[1, 2], 3], 4]),
+    ],
+)
+def test_parse_lines(lines, decoder, expected):
+    assert list(parse_lines(lines, decoder)) == expected
+
+
+def test_parse_lines_is_lazy():
+    def exploding_lines():
+        yield "1"
+        raise AssertionError("Read past the first line")
+
+    assert next(parse_lines(exploding_lines(), decode_int)) == 1
+
+
+def parse_lines(lines: Iterable[str], decoder: Callable[[str], T]) -> Iterator[T]:
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield decoder(line)
+
+
+def test_stream_file(tmp_path):
+    (tmp_path / "input.txt").write_text("forward 5\n\ndown 2\n")
+    assert list(stream_file(str(tmp_path / "input.txt"), decode_word_int)) == [
+        ("forward", 5),
+        ("down", 2),
+    ]
+
+
+def stream_file(filepath: str, decoder: Callable[[str], T]) -> Iterator[T]:
+    with MappedInput(filepath) as mapped:
+        yield from parse_lines(mapped.lines(), decoder)
+
+
+def newline_aligned_ranges(filepath: str, chunks: int) -> List[Tuple[int, int]]:
+    size = os.path.getsize(filepath)
+    boundaries = [0]
+    with open(filepath, "rb") as file:
+        for chunk in range(1, chunks):
+            file.seek(max(chunk * size // chunks, boundaries[-1]))
+            # Finish the line the cut landed in, so no record is split in two
+            file.readline()
+            boundaries.append(min(file.tell(), size))
+    boundaries.append(size)
+    return [
+        (start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end
+    ]
+
+
+def test_newline_aligned_ranges(tmp_path):
+    filepath = tmp_path / "input.txt"
+    filepath.write_text("100\n2\n30\n4000\n5")
+    ranges = newline_aligned_ranges(str(filepath), 3)
+    assert ranges[0][0] == 0 and ranges[-1][1] == filepath.stat().st_size
+    assert all(end == start for (_, end), (start, _) in zip(ranges, ranges[1:]))
+    contents = filepath.read_bytes()
+    assert all(contents[end - 1 : end] == b"\n" for _, end in ranges[:-1])
+
+
+def read_byte_range(filepath: str, byte_range: Tuple[int, int]) -> bytes:
+    start, end = byte_range
+    with open(filepath, "rb") as file:
+        file.seek(start)
+        return file.read(end - start)
+
+
+def map_file_chunks(
+    func: Callable[..., T],
+    filepath: str,
+    *args,
+    chunks: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[T]:
+    # Calls func(filepath, byte_range, *args) for every newline-aligned chunk and
+    # returns the results in file order. func must be picklable for a process pool;
+    # workers=1 runs everything in this process instead.
+    workers = workers or os.cpu_count() or 1
+    byte_ranges = newline_aligned_ranges(filepath, chunks or 4 * workers)
+    arguments = [[filepath] * len(byte_ranges), byte_ranges]
+    arguments += [[arg] * len(byte_ranges) for arg in args]
+    if workers == 1:
+        return list(map(func, *arguments))
+    # Imported here so that serial runs do not pay for multiprocessing at startup
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, *arguments))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_map_file_chunks(tmp_path, workers):
+    filepath = tmp_path / "input.txt"
+    filepath.write_text("".join(f"{i}\n" for i in range(100)))
+    chunks = map_file_chunks(read_byte_range, str(filepath), chunks=7, workers=workers)
+    assert len(chunks) == 7
+    assert b"".join(chunks) == filepath.read_bytes()
+
+
+def little_endian(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def from_little_endian(typecode: str, raw: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(raw)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def test_little_endian_round_trip():
+    column = array("q", [0, 1, -2, 1 << 40])
+    raw = little_endian(column)
+    assert raw[8:16] == b"\x01" + bytes(7)
+    assert from_little_endian("q", raw) == column
+
+
+# Shift coordinates into unsigned 32-bit range so negative points pack too
+COORDINATE_OFFSET = 1 << 31
+LOW_32_BITS = (1 << 32) - 1
+
+
+def pack_point(x: int, y: int) -> int:
+    return ((x + COORDINATE_OFFSET) << 32) | (y + COORDINATE_OFFSET)
+
+
+def unpack_point(key: int) -> Point:
+    return Point(
+        (key >> 32) - COORDINATE_OFFSET, (key & LOW_32_BITS) - COORDINATE_OFFSET
+    )
+
+
+@pytest.mark.parametrize(
+    "point", [Point(0, 0), Point(3, 7), Point(-5, 2), Point(2**31 - 1, -(2**31))]
+)
+def test_pack_point_round_trip(point):
+    assert unpack_point(pack_point(*point)) == point
+
+
+class PackedPointSet:
+    # Points live as sorted, unique 64-bit keys: 8 bytes each instead of a
+    # NamedTuple plus two ints plus a hash table slot
+    __slots__ = ("keys",)
+
+    def __init__(self, points: Iterable[Tuple[int, int]] = ()):
+        self.keys = self._sorted_unique(pack_point(x, y) for x, y in points)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[int]) -> "PackedPointSet":
+        result = cls()
+        result.keys = cls._sorted_unique(keys)
+        return result
+
+    @staticmethod
+    def _sorted_unique(keys: Iterable[int]) -> array:
+        result = array("Q")
+        previous = None
+        for key in sorted(keys):
+            if key != previous:
+                result.append(key)
+                previous = key
+        return result
+
+    @classmethod
+    def _from_sorted_unique(cls, keys: array) -> "PackedPointSet":
+        result = cls()
+        result.keys = keys
+        return result
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __iter__(self) -> Iterator[Point]:
+        return (unpack_point(key) for key in self.keys)
+
+    def __contains__(self, point: Tuple[int, int]) -> bool:
+        key = pack_point(*point)
+        index = bisect_left(self.keys, key)
+        return index < len(self.keys) and self.keys[index] == key
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, PackedPointSet):
+            return self.keys == other.keys
+        if isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(point in other for point in self)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PackedPointSet({list(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.keys) * self.keys.itemsize
+
+    def map(self, transform) -> "PackedPointSet":
+        return PackedPointSet(transform(point) for point in self)
+
+    def union(self, other: "PackedPointSet") -> "PackedPointSet":
+        return self._merge(other, keep_left=True, keep_both=True, keep_right=True)
+
+    def intersection(self, other: "PackedPointSet") -> "PackedPointSet":
+        return self._merge(other, keep_left=False, keep_both=True, keep_right=False)
+
+    def difference(self, other: "PackedPointSet") -> "PackedPointSet":
+        return self._merge(other, keep_left=True, keep_both=False, keep_right=False)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def _merge(
+        self,
+        other: "PackedPointSet",
+        keep_left: bool,
+        keep_both: bool,
+        keep_right: bool,
+    ) -> "PackedPointSet":
+        left, right = self.keys, other.keys
+        result = array("Q")
+        i = j = 0
+        while i < len(left) and j < len(right):
+            if left[i] < right[j]:
+                if keep_left:
+                    result.append(left[i])
+                i += 1
+            elif left[i] > right[j]:
+                if keep_right:
+                    result.append(right[j])
+                j += 1
+            else:
+                if keep_both:
+                    result.append(left[i])
+                i += 1
+                j += 1
+        if keep_left:
+            result.extend(left[i:])
+        if keep_right:
+            result.extend(right[j:])
+        return PackedPointSet._from_sorted_unique(result)
+
+
+def test_packed_point_set_basics():
+    points = PackedPointSet([(3, 4), (1, 2), (3, 4), (-1, 0)])
+    assert len(points) == 3
+    assert list(points) == [Point(-1, 0), Point(1, 2), Point(3, 4)]
+    assert Point(1, 2) in points
+    assert (1, 3) not in points
+    assert points == {Point(3, 4), Point(1, 2), Point(-1, 0)}
+    assert points.nbytes == 24
+
+
+@pytest.mark.parametrize(
+    "left, right",
+    [
+        (set(), set()),
+        ({(1, 1)}, set()),
+        ({(1, 1), (2, 2), (5, 0)}, {(2, 2), (0, 5), (-3, 3)}),
+        ({(0, y) for y in range(10)}, {(x, 0) for x in range(10)}),
+    ],
+)
+def test_packed_point_set_operations(left, right):
+    packed_left, packed_right = PackedPointSet(left), PackedPointSet(right)
+    assert packed_left | packed_right == PackedPointSet(left | right)
+    assert packed_left & packed_right == PackedPointSet(left & right)
+    assert packed_left - packed_right == PackedPointSet(left - right)
+    assert packed_right - packed_left == PackedPointSet(right - left)
+
+
+def test_packed_point_set_map():
+    points = PackedPointSet([(1, 0), (3, 0)])
+    assert points.map(lambda p: Point(4 - p.x, p.y)) == PackedPointSet([(1, 0), (3, 0)])
+    assert points.map(lambda p: Point(0, p.y)) == PackedPointSet([(0, 0)])
+
+
+class MappedInput:
+    def __init__(self, filepath: str):
+        self._file = open(filepath, "rb")
+        if os.fstat(self._file.fileno()).st_size:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # mmap refuses to map an empty file
+            self._buffer = b""
+        self._open_views = weakref.WeakSet()  # type: weakref.WeakSet
+
+    def __enter__(self) -> "MappedInput":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Finish any line_views still part way through, releasing their views
+        for views in list(self._open_views):
+            views.close()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    def line_spans(self) -> Iterator[Tuple[int, int]]:
+        buffer = self._buffer
+        size = len(buffer)
+        start = 0
+        while start < size:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                end = size
+            stop = end - 1 if end > start and buffer[end - 1] == ord("\r") else end
+            yield start, stop
+            start = end + 1
+
+    def line_views(self) -> Iterator[memoryview]:
+        # Zero-copy views into the mapping. Each one is released when the next is
+        # yielded, so copy it with bytes() to keep it longer.
+        views = self._line_views()
+        self._open_views.add(views)
+        return views
+
+    def _line_views(self) -> Iterator[memoryview]:
+        buffer = memoryview(self._buffer)
+        line = None
+        try:
+            for start, stop in self.line_spans():
+                line = buffer[start:stop]
+                yield line
+                line.release()
+        finally:
+            if line is not None:
+                line.release()
+            buffer.release()
+
+    def lines(self) -> Iterator[str]:
+        for start, stop in self.line_spans():
+            yield self._buffer[start:stop].decode()
+
+    def ints(self, column: int = 0, sep: Optional[bytes] = None) -> Iterator[int]:
+        for start, stop in self.line_spans():
+            line = self._buffer[start:stop]
+            if line.strip():
+                yield int(line.split(sep)[column])
+
+    def digit_rows(self) -> Iterator[bytes]:
+        for start, stop in self.line_spans():
+            row = self._buffer[start:stop].strip()
+            if row:
+                yield row.translate(DIGIT_VALUES)
+
+    def chunks(self, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        # About chunk_size bytes at a time, cut after a newline so no line is split
+        # across chunks; a line longer than chunk_size comes whole
+        buffer = self._buffer
+        size = len(buffer)
+        start = 0
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                newline = buffer.rfind(b"\n", start, end)
+                if newline == -1:
+                    newline = buffer.find(b"\n", end)
+                end = size if newline == -1 else newline + 1
+            yield buffer[start:end]
+            start = end
+
+    def int_tokens(self, chunk_size: int = 1 << 16) -> Iterator[int]:
+        # Every whitespace-separated token as an int, read a chunk at a time so
+        # split() and int() do the work in C without holding the whole file
+        for chunk in self.chunks(chunk_size):
+            yield from map(int, chunk.split())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 1 << 20])
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (b"", []),
+        (b"7", [7]),
+        (b"12\n-3\n\n456\n", [12, -3, 456]),
+        (b"12\r\n3 4\r\n", [12, 3, 4]),
+    ],
+)
+def test_mapped_input_int_tokens(tmp_path, text, expected, chunk_size):
+    (tmp_path / "input.txt").write_bytes(text)
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        assert list(mapped.int_tokens(chunk_size)) == expected
+        chunks = list(mapped.chunks(chunk_size))
+    assert b"".join(chunks) == text
+    assert all(chunk.endswith(b"\n") for chunk in chunks[:-1])
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        (b"", []),
+        (b"abc", ["abc"]),
+        (b"abc\n", ["abc"]),
+        (b"abc\r\ndef\r\n", ["abc", "def"]),
+        (b"a\n\nb\n", ["a", "", "b"]),
+    ],
+)
+def test_mapped_input_lines(tmp_path, text, expected):
+    (tmp_path / "input.txt").write_bytes(text)
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        assert list(mapped.lines()) == expected
+
+
+def test_mapped_input_line_views(tmp_path):
+    (tmp_path / "input.txt").write_bytes(b"forward 5\r\nup 3")
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        lines = [bytes(view) for view in mapped.line_views()]
+    assert lines == [b"forward 5", b"up 3"]
+
+
+def test_mapped_input_closes_after_an_early_break(tmp_path):
+    (tmp_path / "input.txt").write_bytes(b"1\n2\n3\n")
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        for line in mapped.lines():
+            break
+        for token in mapped.int_tokens(chunk_size=2):
+            break
+        for view in mapped.line_views():
+            first_view = bytes(view)
+            break
+        unfinished = mapped.line_views()
+        next(unfinished)
+    assert (line, token, first_view) == ("1", 1, b"1")
+
+
+@pytest.mark.parametrize(
+    "text, column, sep, expected",
+    [
+        (b"1\n  2 \n\n30\n", 0, None, [1, 2, 30]),
+        (b"forward 5\nup 3\n", 1, None, [5, 3]),
+        (b"1,2\n5,6\n", 1, b",", [2, 6]),
+    ],
+)
+def test_mapped_input_ints(tmp_path, text, column, sep, expected):
+    (tmp_path / "input.txt").write_bytes(text)
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        assert list(mapped.ints(column=column, sep=sep)) == expected
+
+
+def test_mapped_input_digit_rows(tmp_path):
+    (tmp_path / "input.txt").write_bytes(b"123\n\n456\r\n")
+    with MappedInput(str(tmp_path / "input.txt")) as mapped:
+        assert list(mapped.digit_rows()) == [bytes([1, 2, 3]), bytes([4, 5, 6])]
@@ -0,0 +1,373 @@
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.lazy_pytest import pytest
+from src.runner import (
+    DEFAULT_INPUT_DIR,
+    PARTS,
+    SRC_DIR,
+    available_days,
+    run_part,
+)
+
+DEFAULT_STORE_PATH = SRC_DIR.parent / ".aoc_benchmarks.json"
+DEFAULT_REPEAT = 7
+DEFAULT_ALPHA = 0.05
+# Slowdowns smaller than this are noise on a laptop even when they are significant
+DEFAULT_THRESHOLD = 0.05
+
+Samples = Dict[str, List[float]]
+
+
+def part_key(day: int, part: str) -> str:
+    return f"{day}{part}"
+
+
+def current_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SRC_DIR.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=SRC_DIR.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{revision}+dirty" if dirty else revision
+
+
+class BaselineStore:
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = path
+        if path.exists():
+            self.runs = json.loads(path.read_text())["runs"]
+        else:
+            self.runs = {}  # type: Dict[str, dict]
+
+    def save(self):
+        self.path.write_text(json.dumps({"runs": self.runs}, indent=1, sort_keys=True))
+
+    def record(self, revision: str, samples: Samples):
+        run = self.runs.setdefault(revision, {"parts": {}})
+        run["recorded_at"] = time.time()
+        run["parts"].update(samples)
+
+    def samples(self, revision: str) -> Samples:
+        if revision not in self.runs:
+            raise KeyError(f"No benchmark run recorded for {revision}")
+        return self.runs[revision]["parts"]
+
+    def latest_revision(self, exclude: Optional[str] = None) -> Optional[str]:
+        revisions = sorted(
+            (run["recorded_at"], revision)
+            for revision, run in self.runs.items()
+            if revision != exclude
+        )
+        return revisions[-1][1] if revisions else None
+
+
+def test_baseline_store_round_trip(tmp_path):
+    store = BaselineStore(tmp_path / "benchmarks.json")
+    store.record("abc123", {"1a": [0.1, 0.2]})
+    store.record("def456", {"1a": [0.3]})
+    store.record("abc123", {"1b": [0.4]})
+    store.save()
+
+    reloaded = BaselineStore(tmp_path / "benchmarks.json")
+    assert reloaded.samples("abc123") == {"1a": [0.1, 0.2], "1b": [0.4]}
+    assert reloaded.latest_revision() == "abc123"
+    assert reloaded.latest_revision(exclude="abc123") == "def456"
+    with pytest.raises(KeyError):
+        reloaded.samples("missing")
+
+
+def ranks(values: Sequence[float]) -> List[float]:
+    # Tied values share the average of the ranks they span
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    result = [0.0] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        for i in order[start : end + 1]:
+            result[i] = (start + end) / 2 + 1
+        start = end + 1
+    return result
+
+
+def mann_whitney_greater(
+    candidate: Sequence[float], baseline: Sequence[float]
+) -> float:
+    # One-sided p-value that candidate tends to be larger than baseline, using the
+    # tie-corrected normal approximation to the U distribution
+    n1, n2 = len(candidate), len(baseline)
+    combined = list(candidate) + list(baseline)
+    all_ranks = ranks(combined)
+    u = sum(all_ranks[:n1]) - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    tie_sizes = [combined.count(value) for value in set(combined)]
+    tie_term = sum(t**3 - t for t in tie_sizes) / (n * (n - 1))
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term)
+    if variance == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ([3.0, 1.0, 2.0], [3.0, 1.0, 2.0]),
+        ([1.0, 1.0, 2.0], [1.5, 1.5, 3.0]),
+        ([5.0, 5.0, 5.0], [2.0, 2.0, 2.0]),
+    ],
+)
+def test_ranks(values, expected):
+    assert ranks(values) == expected
+
+
+def test_mann_whitney_greater():
+    baseline = [1.0, 1.1, 0.9, 1.05, 0.95, 1.02, 0.98]
+    slower = [value * 1.5 for value in baseline]
+    assert mann_whitney_greater(slower, baseline) < 0.01
+    assert mann_whitney_greater(baseline, slower) > 0.99
+    assert 0.3 < mann_whitney_greater(baseline, baseline) < 0.7
+    assert mann_whitney_greater([1.0, 1.0], [1.0, 1.0]) == 1.0
+
+
+class Comparison(NamedTuple):
+    key: str
+    baseline_median: float
+    candidate_median: float
+    p_value: float
+    regression: bool
+
+    @property
+    def ratio(self) -> float:
+        return self.candidate_median / self.baseline_median
+
+    def to_json(self) -> str:
+        return json.dumps({**self._asdict(), "ratio": self.ratio})
+
+
+def compare_samples(
+    baseline: Samples,
+    candidate: Samples,
+    alpha: float = DEFAULT_ALPHA,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Comparison]:
+    comparisons = []
+    for key in sorted(baseline.keys() & candidate.keys()):
+        baseline_median = statistics.median(baseline[key])
+        candidate_median = statistics.median(candidate[key])
+        p_value = mann_whitney_greater(candidate[key], baseline[key])
+        comparisons.append(
+            Comparison(
+                key=key,
+                baseline_median=baseline_median,
+                candidate_median=candidate_median,
+                p_value=p_value,
+                regression=p_value < alpha
+                and candidate_median > baseline_median * (1 + threshold),
+            )
+        )
+    return comparisons
+
+
+def test_compare_samples():
+    baseline = {
+        "1a": [1.0, 1.1, 0.9, 1.05, 0.95],
+        "1b": [1.0, 1.1, 0.9, 1.05, 0.95],
+        "2a": [1.0, 1.1, 0.9, 1.05, 0.95],
+        "2b": [1.0],
+    }
+    candidate = {
+        "1a": [2.0, 2.1, 1.9, 2.05, 1.95],
+        "1b": [1.0, 1.1, 0.9, 1.05, 0.95],
+        "2a": [1.02, 1.12, 0.92, 1.07, 0.97],
+        "3a": [1.0],
+    }
+    comparisons = compare_samples(baseline, candidate, threshold=0.5)
+    assert [(c.key, c.regression) for c in comparisons] == [
+        ("1a", True),
+        ("1b", False),
+        ("2a", False),
+    ]
+    assert comparisons[0].ratio == pytest.approx(2.0)
+
+
+def measure(
+    days: Sequence[int],
+    parts: Sequence[str],
+    input_dir: Path = DEFAULT_INPUT_DIR,
+    repeat: int = DEFAULT_REPEAT,
+    warmup: int = 1,
+    timeout: Optional[float] = None,
+) -> Tuple[Samples, Dict[str, str]]:
+    samples = {}  # type: Samples
+    errors = {}  # type: Dict[str, str]
+    for day in days:
+        for part in parts:
+            timings = []
+            for run in range(warmup + repeat):
+                result = run_part(
+                    day=day,
+                    part=part,
+                    input_dir=input_dir,
+                    trace_memory=False,
+                    timeout=timeout,
+                )
+                if result.error:
+                    errors[part_key(day, part)] = result.error
+                    break
+                if run >= warmup:
+                    timings.append(result.wall_time_s)
+            else:
+                samples[part_key(day, part)] = timings
+    return samples, errors
+
+
+def test_measure(tmp_path):
+    (tmp_path / "day1.txt").write_text("199\n200\n208\n210\n200\n207\n240\n269")
+    samples, errors = measure([1, 17], ["a"], input_dir=tmp_path, timeout=0.5)
+    assert list(samples) == ["1a"] and len(samples["1a"]) == DEFAULT_REPEAT
+    assert list(errors) == ["17a"]
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Record solver timings per commit and gate on slowdowns"
+    )
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    measuring = argparse.ArgumentParser(add_help=False)
+    measuring.add_argument(
+        "days", nargs="*", type=int, help="Days to time (default: every day)"
+    )
+    measuring.add_argument("--parts", nargs="+", choices=PARTS, default=list(PARTS))
+    measuring.add_argument("--input-dir", type=Path, default=DEFAULT_INPUT_DIR)
+    measuring.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    measuring.add_argument("--warmup", type=int, default=1)
+    measuring.add_argument("--timeout", type=float)
+
+    record = commands.add_parser(
+        "record", parents=[measuring], help="Time the working tree and store it"
+    )
+    record.add_argument(
+        "--revision", help="Store under this name (default: the current git commit)"
+    )
+
+    compare = commands.add_parser(
+        "compare",
+        parents=[measuring],
+        help="Exit non-zero if a candidate is significantly slower than a baseline",
+    )
+    compare.add_argument(
+        "--baseline",
+        help="Stored revision to compare against (default: the latest one)",
+    )
+    compare.add_argument(
+        "--candidate",
+        help="Stored revision to check (default: time the working tree now)",
+    )
+    compare.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Ignore median slowdowns smaller than this fraction",
+    )
+    return parser.parse_args(argv)
+
+
+def measure_from_args(args: argparse.Namespace) -> Samples:
+    samples, errors = measure(
+        days=args.days or available_days(),
+        parts=args.parts,
+        input_dir=args.input_dir,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        timeout=args.timeout,
+    )
+    for key, error in errors.items():
+        print(json.dumps({"key": key, "error": error}), file=sys.stderr)
+    return samples
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    store = BaselineStore(args.store)
+    if args.command == "record":
+        revision = args.revision or current_revision()
+        store.record(revision, measure_from_args(args))
+        store.save()
+        print(json.dumps({"revision": revision, "store": str(args.store)}))
+        return 0
+
+    baseline_revision = args.baseline or store.latest_revision(exclude=args.candidate)
+    if baseline_revision is None:
+        print(f"No baseline recorded in {args.store}", file=sys.stderr)
+        return 2
+    if args.candidate:
+        candidate = store.samples(args.candidate)
+    else:
+        candidate = measure_from_args(args)
+    baseline = store.samples(baseline_revision)
+    if args.days:
+        wanted = {part_key(day, part) for day in args.days for part in args.parts}
+        candidate = {key: value for key, value in candidate.items() if key in wanted}
+
+    comparisons = compare_samples(baseline, candidate, args.alpha, args.threshold)
+    for comparison in comparisons:
+        print(comparison.to_json())
+    return 1 if any(comparison.regression for comparison in comparisons) else 0
+
+
+def test_main_gates_on_regressions(tmp_path):
+    store = BaselineStore(tmp_path / "benchmarks.json")
+    store.record("before", {"14a": [1.0, 1.1, 0.9, 1.05, 0.95, 1.0, 1.02]})
+    store.record("after", {"14a": [1.5, 1.6, 1.4, 1.55, 1.45, 1.5, 1.52]})
+    store.save()
+    arguments = ["--store", str(tmp_path / "benchmarks.json"), "compare"]
+    assert main(arguments + ["--baseline", "before", "--candidate", "after"]) == 1
+    assert main(arguments + ["--baseline", "after", "--candidate", "before"]) == 0
+    assert (
+        main(
+            arguments
+            + ["--baseline", "before", "--candidate", "after", "--threshold", "1"]
+        )
+        == 0
+    )
+
+
+def test_main_records_the_working_tree(tmp_path):
+    (tmp_path / "day1.txt").write_text("199\n200\n208\n210\n200\n207\n240\n269")
+    store_path = tmp_path / "benchmarks.json"
+    arguments = ["--store", str(store_path)]
+    measuring = ["1", "--input-dir", str(tmp_path), "--repeat", "3"]
+    assert main(arguments + ["record", "--revision", "base"] + measuring) == 0
+    assert set(BaselineStore(store_path).samples("base")) == {"1a", "1b"}
+    # Timing noise alone must not trip the gate at a generous threshold
+    compare = ["compare", "--baseline", "base", "--threshold", "10"]
+    assert main(arguments + compare + measuring) == 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
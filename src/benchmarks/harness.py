@@ -0,0 +1,188 @@
+import argparse
+import json
+import math
+import tempfile
+from pathlib import Path
+from typing import NamedTuple, Optional, List, Sequence, Iterator, Dict, Tuple
+
+from src.lazy_pytest import pytest
+from src.benchmarks.generators import generate_input, generated_days
+from src.runner import PARTS, run_part
+
+DEFAULT_SCALES = (1, 10, 100, 1000)
+
+
+class BenchmarkResult(NamedTuple):
+    day: int
+    part: str
+    scale: int
+    input_bytes: int
+    seconds: Optional[float]
+    error: Optional[str] = None
+
+    @property
+    def bytes_per_second(self) -> Optional[float]:
+        if not self.seconds:
+            return None
+        return self.input_bytes / self.seconds
+
+    def to_json(self) -> str:
+        return json.dumps({**self._asdict(), "bytes_per_second": self.bytes_per_second})
+
+
+@pytest.mark.parametrize(
+    "sizes, times, expected",
+    [
+        ([1, 10, 100], [2, 20, 200], 1.0),
+        ([1, 10, 100], [3, 300, 30000], 2.0),
+        ([4, 16], [5, 10], 0.5),
+        ([1, 2, 4, 8], [7, 7, 7, 7], 0.0),
+    ],
+)
+def test_fit_exponent(sizes, times, expected):
+    assert fit_exponent(sizes, times) == pytest.approx(expected)
+
+
+def test_fit_exponent_needs_two_sizes():
+    assert fit_exponent([10], [1.0]) is None
+    assert fit_exponent([10, 10], [1.0, 2.0]) is None
+
+
+def fit_exponent(sizes: Sequence[float], times: Sequence[float]) -> Optional[float]:
+    # Least squares slope of log(time) against log(size): time ~ size ** exponent
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(time) for time in times]
+    if len(set(xs)) < 2:
+        return None
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    return covariance / variance
+
+
+def benchmark_part(
+    day: int,
+    part: str,
+    scales: Sequence[int] = DEFAULT_SCALES,
+    seed: int = 0,
+    repeat: int = 3,
+    timeout: Optional[float] = 60.0,
+) -> Iterator[BenchmarkResult]:
+    with tempfile.TemporaryDirectory() as input_dir:
+        for scale in scales:
+            filepath = Path(input_dir) / f"day{day}.txt"
+            filepath.write_text(generate_input(day, scale=scale, seed=seed))
+            input_bytes = filepath.stat().st_size
+            timings = []
+            error = None
+            for _ in range(repeat):
+                result = run_part(
+                    day=day,
+                    part=part,
+                    input_dir=Path(input_dir),
+                    trace_memory=False,
+                    timeout=timeout,
+                )
+                if result.error:
+                    error = result.error
+                    break
+                timings.append(result.wall_time_s)
+            yield BenchmarkResult(
+                day=day,
+                part=part,
+                scale=scale,
+                input_bytes=input_bytes,
+                seconds=None if error else min(timings),
+                error=error,
+            )
+            if error:
+                # Larger inputs will only take longer, so stop climbing
+                return
+
+
+def test_benchmark_part():
+    results = list(benchmark_part(day=1, part="a", scales=[1, 10], repeat=1))
+    assert [(r.day, r.part, r.scale, r.error) for r in results] == [
+        (1, "a", 1, None),
+        (1, "a", 10, None),
+    ]
+    assert results[1].input_bytes > 9 * results[0].input_bytes
+    assert summarise(results)[(1, "a")] == pytest.approx(1.0, abs=0.5)
+
+
+def test_benchmark_part_stops_after_timeout():
+    results = list(
+        benchmark_part(day=1, part="a", scales=[1, 10], repeat=1, timeout=1e-6)
+    )
+    assert len(results) == 1
+    assert results[0].error.startswith("SolverTimeout")
+
+
+def summarise(results: Sequence[BenchmarkResult]) -> Dict[Tuple[int, str], float]:
+    by_part = {}  # type: Dict[Tuple[int, str], List[BenchmarkResult]]
+    for result in results:
+        if result.seconds:
+            by_part.setdefault((result.day, result.part), []).append(result)
+    exponents = {}
+    for key, part_results in by_part.items():
+        exponent = fit_exponent(
+            [result.input_bytes for result in part_results],
+            [result.seconds for result in part_results],
+        )
+        if exponent is not None:
+            exponents[key] = exponent
+    return exponents
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Time solvers on generated inputs of increasing size"
+    )
+    parser.add_argument(
+        "days", nargs="*", type=int, help="Days to run (default: every generated day)"
+    )
+    parser.add_argument("--parts", nargs="+", choices=PARTS, default=list(PARTS))
+    parser.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+    missing = sorted(set(args.days) - set(generated_days()))
+    if missing:
+        parser.error(
+            f"no input generator for day(s) {', '.join(map(str, missing))}; "
+            f"choose from {', '.join(map(str, generated_days()))}"
+        )
+    return args
+
+
+def test_parse_args_rejects_days_without_a_generator(capsys):
+    assert parse_args(["1", "2"]).days == [1, 2]
+    assert parse_args([]).days == []
+    with pytest.raises(SystemExit):
+        parse_args(["1", "17", "21"])
+    assert "no input generator for day(s) 17, 21" in capsys.readouterr().err
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    results = []
+    for day in args.days or generated_days():
+        for part in args.parts:
+            for result in benchmark_part(
+                day=day,
+                part=part,
+                scales=args.scales,
+                seed=args.seed,
+                repeat=args.repeat,
+                timeout=args.timeout,
+            ):
+                print(result.to_json(), flush=True)
+                results.append(result)
+    for (day, part), exponent in summarise(results).items():
+        print(json.dumps({"day": day, "part": part, "exponent": exponent}))
+
+
+if __name__ == "__main__":
+    main()
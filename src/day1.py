@@ -1,6 +1,12 @@
-from typing import List
+import itertools
+import operator
+from array import array
+from typing import List, Iterable, Sequence, Dict, NamedTuple, Tuple, Optional
 
-import pytest
+from src.lazy_pytest import pytest
+from src.aoc_helpers import MappedInput, map_file_chunks, read_byte_range
+
+SLIDING_WINDOW = 3
 
 
 @pytest.mark.parametrize(
@@ -19,14 +25,47 @@ def test_count_increase(input_list, expected_count):
     assert count_increase(input_list) == expected_count
 
 
-def count_increase(numbers: List[int]) -> int:
-    count = 0
-    if len(numbers) < 2:
-        return count
+def test_count_increase_on_iterator():
+    assert count_increase(iter([1, 2, 3, 2, 4, 10, 4, 2, 6])) == 5
+
+
+def count_increase(numbers: Iterable[int]) -> int:
+    return count_window_increases(numbers, window=1)
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 4, 7])
+@pytest.mark.parametrize(
+    "input_list",
+    [[], [5], [1, 2, 3], [1, 2, 1, 4, 10, -4], [199, 200, 208, 210, 200, 207, 240]],
+)
+def test_count_window_increases(input_list, window):
+    expected = count_increase(calculate_sliding_window_sums(input_list, window))
+    assert count_window_increases(iter(input_list), window) == expected
+
 
-    for i in range(len(numbers) - 1):
-        if numbers[i] < numbers[i + 1]:
+def test_count_window_increases_rejects_empty_windows():
+    with pytest.raises(ValueError):
+        count_window_increases([1, 2], window=0)
+
+
+def count_window_increases(numbers: Iterable[int], window: int) -> int:
+    # Neighbouring windows share all but their end points, so the sum over
+    # i+1..i+window beats the sum over i..i+window-1 exactly when
+    # numbers[i + window] > numbers[i]. Only the last `window` depths are kept, in
+    # a ring buffer, however long the stream is.
+    if window < 1:
+        raise ValueError(f"Window size must be positive, not {window}")
+    numbers = iter(numbers)
+    ring = list(itertools.islice(numbers, window))
+    count = 0
+    position = 0
+    for number in numbers:
+        if number > ring[position]:
             count += 1
+        ring[position] = number
+        position += 1
+        if position == window:
+            position = 0
     return count
 
 
@@ -72,20 +111,139 @@ def test_calculate_sliding_window_sums(input_list, expected_list):
     assert calculate_sliding_window_sums(input_list) == expected_list
 
 
-def calculate_sliding_window_sums(input_list: List[int]) -> List[int]:
-    return [sum(input_list[i : i + 3]) for i in range(len(input_list) - 2)]
+def calculate_sliding_window_sums(
+    input_list: List[int], window: int = SLIDING_WINDOW
+) -> List[int]:
+    # Differences of prefix sums, so wide windows cost no more than narrow ones
+    prefix_sums = list(itertools.accumulate(input_list, initial=0))
+    return list(map(operator.sub, prefix_sums[window:], prefix_sums))
+
+
+def load_depths(filepath: str) -> array:
+    with MappedInput(filepath) as mapped:
+        return array("q", mapped.int_tokens())
+
+
+def count_window_increases_batch(depths: Sequence[int], window: int) -> int:
+    # The streaming identity as one shifted comparison over the whole array:
+    # map/operator.lt run in C over zero-copy views of the same buffer
+    if window < 1:
+        raise ValueError(f"Window size must be positive, not {window}")
+    view = memoryview(depths) if isinstance(depths, array) else depths
+    return sum(map(operator.lt, view[: max(len(depths) - window, 0)], view[window:]))
+
+
+def count_increases_for_windows(
+    depths: Sequence[int], windows: Iterable[int]
+) -> Dict[int, int]:
+    return {window: count_window_increases_batch(depths, window) for window in windows}
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 5, 20])
+def test_count_window_increases_batch_matches_streaming(window):
+    depths = array("q", [(i * 7919) % 101 - 50 for i in range(500)])
+    expected = count_window_increases(depths, window)
+    assert count_window_increases_batch(depths, window) == expected
+    assert count_window_increases_batch(list(depths), window) == expected
+
+
+def test_count_increases_for_windows(tmp_path):
+    (tmp_path / "day1.txt").write_text(
+        "199\n200\n208\n210\n200\n207\n240\n269\n260\n263"
+    )
+    depths = load_depths(str(tmp_path / "day1.txt"))
+    assert count_increases_for_windows(depths, [1, 3, 10, 11]) == {
+        1: 7,
+        3: 5,
+        10: 0,
+        11: 0,
+    }
+
+
+class ChunkSummary(NamedTuple):
+    # Increases inside the chunk, plus the depths a neighbouring chunk may compare
+    # against: its first and last `window` depths (all of them if fewer)
+    increases: int
+    head: Tuple[int, ...]
+    tail: Tuple[int, ...]
+
+
+def summarise_depths(depths: Sequence[int], window: int) -> ChunkSummary:
+    return ChunkSummary(
+        increases=count_window_increases_batch(depths, window),
+        head=tuple(depths[:window]),
+        tail=tuple(depths[max(len(depths) - window, 0) :]),
+    )
+
+
+def merge_summaries(
+    left: ChunkSummary, right: ChunkSummary, window: int
+) -> ChunkSummary:
+    # Pairs (i, i + window) straddling the boundary start in left's tail and end in
+    # right's head; anything further from the boundary is already counted
+    joined = left.tail + right.head
+    crossing = sum(
+        joined[i] < joined[i + window]
+        for i in range(len(left.tail))
+        if i + window < len(joined)
+    )
+    return ChunkSummary(
+        increases=left.increases + right.increases + crossing,
+        head=(left.head + right.head)[:window],
+        tail=(left.tail + right.tail)[-window:],
+    )
+
+
+def summarise_byte_range(
+    filepath: str, byte_range: Tuple[int, int], window: int
+) -> ChunkSummary:
+    depths = array("q", map(int, read_byte_range(filepath, byte_range).split()))
+    return summarise_depths(depths, window)
+
+
+def count_window_increases_chunked(
+    filepath: str,
+    window: int = 1,
+    chunks: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> int:
+    summaries = map_file_chunks(
+        summarise_byte_range, filepath, window, chunks=chunks, workers=workers
+    )
+    total = ChunkSummary(0, (), ())
+    for summary in summaries:
+        total = merge_summaries(total, summary, window)
+    return total.increases
+
+
+@pytest.mark.parametrize("window", [1, 3, 7])
+@pytest.mark.parametrize("chunks", [1, 2, 5, 40, 1000])
+def test_count_window_increases_chunked_matches_serial(tmp_path, chunks, window):
+    depths = [(i * 7919) % 101 for i in range(300)]
+    filepath = tmp_path / "day1.txt"
+    filepath.write_text("\n".join(str(depth) for depth in depths) + "\n")
+    expected = count_window_increases(depths, window)
+    assert (
+        count_window_increases_chunked(str(filepath), window, chunks, workers=1)
+        == expected
+    )
+
+
+def test_count_window_increases_in_a_process_pool(tmp_path):
+    filepath = tmp_path / "day1.txt"
+    filepath.write_text("199\n200\n208\n210\n200\n207\n240\n269\n260\n263")
+    assert count_window_increases_chunked(str(filepath), 1, chunks=3, workers=2) == 7
+    assert count_window_increases_chunked(str(filepath), 3, chunks=3, workers=2) == 5
 
 
 def day_1a(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        numbers = get_numbers_from_string(file.read())
-    return count_increase(numbers)
+    with MappedInput(filepath) as mapped:
+        return count_increase(mapped.int_tokens())
 
 
 def day_2a(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        numbers = get_numbers_from_string(file.read())
-    return count_increase(calculate_sliding_window_sums(numbers))
+    with MappedInput(filepath) as mapped:
+        return count_window_increases(mapped.int_tokens(), window=SLIDING_WINDOW)
 
 
 if __name__ == "__main__":
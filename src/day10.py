@@ -1,6 +1,7 @@
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Iterable
 
-import pytest
+from src.lazy_pytest import pytest
+from src.aoc_helpers import MappedInput, iter_lines
 
 
 @pytest.mark.parametrize(
@@ -85,8 +86,12 @@ def test_score_lines(input_string, expected):
 
 
 def score_lines(input_string: str) -> int:
+    return score_corrupted_lines(iter_lines(input_string.strip()))
+
+
+def score_corrupted_lines(lines: Iterable[str]) -> int:
     result = 0
-    for line in input_string.strip().split("\n"):
+    for line in lines:
         result += CHAR_TO_SCORE.get(find_first_corrupted_char(line)) or 0
     return result
 
@@ -291,8 +296,12 @@ def test_score_lines_2(input_string, expected):
 
 
 def score_lines_2(input_string: str) -> int:
+    return score_incomplete_lines(iter_lines(input_string.strip()))
+
+
+def score_incomplete_lines(lines: Iterable[str]) -> int:
     scores = []
-    for line in input_string.strip().split("\n"):
+    for line in lines:
         completion_string = get_completion_string(line)
         if completion_string:
             scores.append(calculate_completion_score(completion_string))
@@ -303,13 +312,13 @@ def score_lines_2(input_string: str) -> int:
 
 
 def day10a(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        return score_lines(file.read())
+    with MappedInput(filepath) as mapped:
+        return score_corrupted_lines(mapped.lines())
 
 
 def day10b(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        return score_lines_2(file.read())
+    with MappedInput(filepath) as mapped:
+        return score_incomplete_lines(mapped.lines())
 
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
 from typing import List, Tuple, Set
 
-import pytest
-
-from src.aoc_helpers import parse_digit_matrix
+from src.lazy_pytest import pytest
+from src.aoc_helpers import parse_digit_matrix, GridAdjacency
 
 
 @pytest.fixture()
@@ -183,12 +182,35 @@ def test_run_n_cycles_on_aoc_example():
 
 
 def run_n_cycles(matrix: List[List[int]], cycles: int) -> Tuple[List[List[int]], int]:
-    updated_matrix = matrix
+    energies, adjacency = flatten(matrix)
     flash_count = 0
     for _ in range(cycles):
-        updated_matrix, count = run_one_cycle(updated_matrix)
-        flash_count += count
-    return updated_matrix, flash_count
+        flash_count += flash_cycle(energies, adjacency)
+    return unflatten(energies, adjacency), flash_count
+
+
+def flatten(matrix: List[List[int]]) -> Tuple[List[int], GridAdjacency]:
+    width = len(matrix[0]) if matrix else 0
+    energies = [energy for row in matrix for energy in row]
+    return energies, GridAdjacency(width, len(matrix), diagonals=True)
+
+
+def unflatten(energies: List[int], adjacency: GridAdjacency) -> List[List[int]]:
+    width = adjacency.width
+    return [energies[y * width : (y + 1) * width] for y in range(adjacency.height)]
+
+
+def flash_cycle(energies: List[int], adjacency: GridAdjacency) -> int:
+    # Steps row-major energies in place and returns how many octopuses flashed
+    energies[:] = [energy + 1 for energy in energies]
+    flashing = [cell for cell, energy in enumerate(energies) if energy > 9]
+    flash_count = 0
+    while flashing:
+        flash_count += len(flashing)
+        # Only a neighbour's first step past 9 makes it flash, so none flash twice
+        flashing = adjacency.scatter_add(energies, flashing, limit=9)
+    energies[:] = [0 if energy > 9 else energy for energy in energies]
+    return flash_count
 
 
 @pytest.mark.parametrize(
@@ -204,21 +226,7 @@ def test_run_one_cycle(matrix, expected_matrix, expected_count):
 
 
 def run_one_cycle(matrix: List[List[int]]) -> Tuple[List[List[int]], int]:
-    updated_matrix = increment_everything(matrix)
-    to_process = find_cells_greater_than_threshold(updated_matrix)
-    flashed_cells = set()
-    while to_process:
-        flasher = to_process.pop()
-        if flasher not in flashed_cells:
-            flashed_cells.add(flasher)
-            neighbors = find_neighbor_cells(matrix=matrix, x=flasher[0], y=flasher[1])
-            updated_matrix = increment_target_cells(
-                matrix=updated_matrix, target_cells=neighbors
-            )
-            to_process.update(find_cells_greater_than_threshold(updated_matrix))
-    return reset_target_cells(matrix=updated_matrix, target_cells=flashed_cells), len(
-        flashed_cells
-    )
+    return run_n_cycles(matrix=matrix, cycles=1)
 
 
 @pytest.mark.parametrize(
@@ -255,17 +263,13 @@ def test_find_first_everyone_flash_aoc_example():
 
 def find_first_everyone_flash(matrix: List[List[int]]) -> int:
     octopus_round = 0
-    current_matrix = matrix
-    while any_non_zeros(current_matrix):
+    energies, adjacency = flatten(matrix)
+    while any(energies):
         octopus_round += 1
-        current_matrix, _ = run_one_cycle(current_matrix)
+        flash_cycle(energies, adjacency)
     return octopus_round
 
 
-def any_non_zeros(matrix: List[List[int]]) -> bool:
-    return any([any(row) for row in matrix])
-
-
 def day11a(filepath: str) -> int:
     with open(filepath, "r") as file:
         matrix = parse_digit_matrix(file.read())
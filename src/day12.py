@@ -1,7 +1,8 @@
 from collections import defaultdict
 from typing import Set, Dict, Tuple, Optional, Callable
 
-import pytest
+from src.lazy_pytest import pytest
+from src.aoc_helpers import iter_lines, parse_lines, decode_link
 
 
 @pytest.mark.parametrize(
@@ -24,11 +25,7 @@ def test_parse_input(input_string, expected):
 
 def parse_input(input_string) -> Dict[str, Set[str]]:
     result = defaultdict(lambda: set())  # type: Dict[str, Set[str]]
-    if not input_string:
-        return result
-
-    for line in input_string.strip().split("\n"):
-        [location_a, location_b] = line.strip().split("-")
+    for location_a, location_b in parse_lines(iter_lines(input_string), decode_link):
         if location_a != "end" and location_b != "start":
             result[location_a].add(location_b)
         if location_a != "start" and location_b != "end":
@@ -1,16 +1,7 @@
-from typing import NamedTuple, Set, List
+from typing import NamedTuple, Set, List, Iterator
 
-import pytest
-
-
-class Point(NamedTuple):
-    x: int
-    y: int
-
-    @classmethod
-    def from_string(cls, input_string: str) -> "Point":
-        [x, y] = input_string.strip().split(",")
-        return Point(x=int(x), y=int(y))
+from src.lazy_pytest import pytest
+from src.aoc_helpers import Point, PackedPointSet
 
 
 @pytest.mark.parametrize(
@@ -31,13 +22,14 @@ def test_parse_input_points(input_string, expected):
 
 
 def parse_input_points(input_string) -> Set[Point]:
-    if not input_string:
-        return set()
+    return set(iter_input_points(input_string))
 
-    result = set()
+
+def iter_input_points(input_string) -> Iterator[Point]:
+    if not input_string:
+        return
     for line in input_string.strip().split("\n\n")[0].split("\n"):
-        result.add(Point.from_string(line))
-    return result
+        yield Point.from_string(line)
 
 
 class Fold(NamedTuple):
@@ -129,6 +121,39 @@ def fold_on_y(a_fold, points):
     return kept_points.union(folded_points)
 
 
+@pytest.mark.parametrize(
+    "points, a_fold",
+    [
+        (set(), Fold("x", 3)),
+        ({Point(0, 0), Point(3, 0)}, Fold("x", 2)),
+        ({Point(1, 0), Point(4, 0), Point(5, 1), Point(6, 2)}, Fold("x", 3)),
+        ({Point(0, 1), Point(0, 4), Point(1, 5), Point(2, 6)}, Fold("y", 3)),
+        ({Point(0, 1), Point(0, 3), Point(1, 5)}, Fold("y", 3)),
+    ],
+)
+def test_fold_packed_matches_fold(points, a_fold):
+    assert fold_packed(PackedPointSet(points), a_fold) == fold(points, a_fold)
+
+
+def fold_packed(points: PackedPointSet, a_fold: Fold) -> PackedPointSet:
+    if a_fold.dimension not in ("x", "y"):
+        raise Exception(f"Cannot fold on {a_fold.dimension}")
+    line = a_fold.coordinate
+    if a_fold.dimension == "x":
+        folded = (
+            Point(x=min(point.x, 2 * line - point.x), y=point.y)
+            for point in points
+            if point.x != line
+        )
+    else:
+        folded = (
+            Point(x=point.x, y=min(point.y, 2 * line - point.y))
+            for point in points
+            if point.y != line
+        )
+    return PackedPointSet(folded)
+
+
 @pytest.fixture
 def aoc_input_text() -> str:
     return """6,10
@@ -180,11 +205,11 @@ def test_do_all_folds(aoc_input_text, aoc_result):
     assert do_all_folds(aoc_input_text) == aoc_result
 
 
-def do_all_folds(input_string: str) -> Set[Point]:
-    points = parse_input_points(input_string)
+def do_all_folds(input_string: str) -> PackedPointSet:
+    points = PackedPointSet(iter_input_points(input_string))
     folds = parse_input_folds(input_string)
     for a_fold in folds:
-        points = fold(points=points, a_fold=a_fold)
+        points = fold_packed(points=points, a_fold=a_fold)
     return points
 
 
@@ -238,9 +263,9 @@ def test_print_output_aoc_example(aoc_result):
 def part_a(filepath: str):
     with open(filepath, "r") as file:
         input_text = file.read()
-    points = parse_input_points(input_text)
+    points = PackedPointSet(iter_input_points(input_text))
     a_fold = parse_input_folds(input_text)[0]
-    return len(fold(points=points, a_fold=a_fold))
+    return len(fold_packed(points=points, a_fold=a_fold))
 
 
 def part_b(filepath: str):
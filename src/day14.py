@@ -1,7 +1,11 @@
 from collections import defaultdict
 from typing import Dict
 
-import pytest
+from src.lazy_pytest import pytest
+from src.dispatch import Strategy, dispatch
+
+# Past this many characters, building the polymer costs more than counting pairs
+STRING_POLYMER_MAX_LENGTH = 10000
 
 
 @pytest.mark.parametrize(
@@ -137,7 +141,8 @@ def polymer_insertion(polymer: str, insertion_rules: Dict[str, str]):
     result = ""
     for i in range(len(polymer)):
         result += polymer[i]
-        result += insertion_rules[polymer[i : i + 2]]
+        # get rather than [] so a defaultdict of rules is not grown with dead pairs
+        result += insertion_rules.get(polymer[i : i + 2], "")
     return result
 
 
@@ -305,14 +310,65 @@ def test_find_max_min_difference(aoc_example_input):
 
 def find_max_min_difference(input_text: str, steps: int) -> int:
     polymer = parse_polymer_template(input_text)
-    polymer_dict = parse_polymer_pair_dict(polymer)
     insertion_rules = parse_insertion_rules(input_text)
-    final_polymer_dict = run_n_steps_dict(
-        polymer_dict=polymer_dict, insertion_rules=insertion_rules, steps=steps
+    letter_counts = letter_counts_after_steps(polymer, insertion_rules, steps)
+    return max(letter_counts.values()) - min(letter_counts.values())
+
+
+def polymer_length_after_steps(polymer: str, steps: int) -> int:
+    # Worst case, where every pair has a rule and the polymer doubles each step
+    return (len(polymer) - 1) * 2**steps + 1 if polymer else 0
+
+
+def letter_counts_after_steps(
+    polymer: str, insertion_rules: Dict[str, str], steps: int
+) -> Dict[str, int]:
+    return dispatch(
+        "day14 polymer",
+        polymer_length_after_steps(polymer, steps),
+        [
+            Strategy("string", letter_counts_by_string, STRING_POLYMER_MAX_LENGTH),
+            Strategy("pair counts", letter_counts_by_pairs),
+        ],
+        polymer,
+        insertion_rules,
+        steps,
     )
-    return get_most_common_letter_count_dict(
-        final_polymer_dict
-    ) - get_least_common_letter_count_dict(final_polymer_dict)
+
+
+def letter_counts_by_string(
+    polymer: str, insertion_rules: Dict[str, str], steps: int
+) -> Dict[str, int]:
+    return count_letters(
+        run_n_steps(polymer=polymer, insertion_rules=insertion_rules, steps=steps)
+    )
+
+
+def letter_counts_by_pairs(
+    polymer: str, insertion_rules: Dict[str, str], steps: int
+) -> Dict[str, int]:
+    return count_letters_dict(
+        run_n_steps_dict(
+            polymer_dict=parse_polymer_pair_dict(polymer),
+            insertion_rules=insertion_rules,
+            steps=steps,
+        )
+    )
+
+
+@pytest.mark.parametrize("steps", range(8))
+@pytest.mark.parametrize("polymer", ["NNCB", "B", "CHBNNHC", ""])
+def test_letter_count_strategies_agree(polymer, steps, aoc_insertion_rules):
+    by_string = letter_counts_by_string(polymer, aoc_insertion_rules, steps)
+    assert by_string == letter_counts_by_pairs(polymer, aoc_insertion_rules, steps)
+
+
+@pytest.mark.parametrize(
+    "polymer, steps, expected",
+    [("", 40, 0), ("N", 40, 1), ("NNCB", 0, 4), ("NNCB", 1, 7), ("NNCB", 10, 3073)],
+)
+def test_polymer_length_after_steps(polymer, steps, expected):
+    assert polymer_length_after_steps(polymer, steps) == expected
 
 
 def part_a(filepath: str):
@@ -1,12 +1,19 @@
 import functools
 import heapq
+import random
 import sys
-from collections import defaultdict
-from typing import List, Tuple, Dict, Set
-
-import pytest
+from typing import List, Tuple, Dict
+
+from src.lazy_pytest import pytest
+from src.aoc_helpers import (
+    parse_digit_matrix,
+    Point,
+    list_matrix_to_tuple_matrix,
+    DigitGrid,
+    GridAdjacency,
+)
 
-from src.aoc_helpers import parse_digit_matrix, Point, list_matrix_to_tuple_matrix
+UNREACHED = 1000000000000000
 
 
 @pytest.fixture
@@ -68,21 +75,6 @@ def find_risk_of_best_route(
     return lowest_score
 
 
-def get_candidate_neighbors(node: Point, unvisited_nodes: Set[Point]) -> List[Point]:
-    x = node.x
-    y = node.y
-    return [
-        neighbor
-        for neighbor in [
-            Point(x + 1, y),
-            Point(x - 1, y),
-            Point(x, y + 1),
-            Point(x, y - 1),
-        ]
-        if neighbor in unvisited_nodes
-    ]
-
-
 def test_dijkstra(aoc_example_matrix):
     assert dijkstra(aoc_example_matrix)[Point(9, 9)] == 40
     assert (
@@ -94,27 +86,38 @@ def test_dijkstra(aoc_example_matrix):
 
 
 def dijkstra(matrix: Tuple[Tuple[int, ...], ...]) -> Dict[Point, int]:
-    unvisited_nodes = set()
-    for i in range(len(matrix)):
-        for j in range(len(matrix[i])):
-            unvisited_nodes.add(Point(i, j))
-    result = defaultdict(lambda: 1000000000000000)
-    result[Point(0, 0)] = 0
-    available_to_visit_heap = []
-    heapq.heappush(available_to_visit_heap, (0, Point(0, 0)))
-
-    while unvisited_nodes:
-        current_node_score, current_node = heapq.heappop(available_to_visit_heap)
-        if current_node in unvisited_nodes:
-            unvisited_nodes.remove(current_node)
-            candidates = get_candidate_neighbors(
-                node=current_node, unvisited_nodes=unvisited_nodes
-            )
-            for node in candidates:
-                score = min(current_node_score + matrix[node.x][node.y], result[node])
-                result[node] = score
-                heapq.heappush(available_to_visit_heap, (score, node))
-    return result
+    risks, adjacency = flatten(matrix)
+    scores = lowest_total_risks(risks, adjacency)
+    return {
+        Point(*divmod(cell, adjacency.width)): score
+        for cell, score in enumerate(scores)
+    }
+
+
+def flatten(matrix: Tuple[Tuple[int, ...], ...]) -> Tuple[bytes, GridAdjacency]:
+    # Cell matrix[x][y] becomes risks[x * len(matrix[0]) + y]
+    risks = bytes(risk for row in matrix for risk in row)
+    return risks, GridAdjacency(len(matrix[0]) if matrix else 0, len(matrix))
+
+
+def lowest_total_risks(
+    risks: bytes, adjacency: GridAdjacency, source: int = 0
+) -> List[int]:
+    starts = adjacency.starts
+    targets = adjacency.targets
+    scores = [UNREACHED] * len(risks)
+    scores[source] = 0
+    available_to_visit_heap = [(0, source)]
+    while available_to_visit_heap:
+        current_score, current = heapq.heappop(available_to_visit_heap)
+        if current_score > scores[current]:
+            continue
+        for neighbor in targets[starts[current] : starts[current + 1]]:
+            score = current_score + risks[neighbor]
+            if score < scores[neighbor]:
+                scores[neighbor] = score
+                heapq.heappush(available_to_visit_heap, (score, neighbor))
+    return scores
 
 
 def get_candidate_points(
@@ -176,18 +179,48 @@ def test_find_best_path_on_multiplied_matrix(aoc_example_matrix):
 
 def find_best_path_on_multiplied_matrix(matrix: Tuple[Tuple[int, ...], ...]) -> int:
     multiplied_matrix = build_multiplied_matrix(matrix=matrix, multiplier=5)
-    return dijkstra(matrix=multiplied_matrix)[Point(499, 499)]
+    return lowest_risk(multiplied_matrix)
+
+
+def lowest_risk(matrix: Tuple[Tuple[int, ...], ...]) -> int:
+    # Always Dijkstra: find_risk_of_best_route only steps right or down, so it is not
+    # an equivalent strategy for any grid size
+    risks, adjacency = flatten(matrix)
+    return lowest_total_risks(risks, adjacency)[-1]
+
+
+@pytest.fixture
+def random_matrices() -> List[Tuple[Tuple[int, ...], ...]]:
+    rng = random.Random(0)
+    sizes = [(rng.randint(1, 6), rng.randint(1, 6)) for _ in range(50)]
+    return [
+        tuple(tuple(rng.randint(1, 9) for _ in range(width)) for _ in range(height))
+        for width, height in sizes
+    ]
+
+
+def test_lowest_risk_never_worse_than_right_and_down(
+    aoc_example_matrix, random_matrices
+):
+    for matrix in [aoc_example_matrix] + random_matrices:
+        monotone = find_risk_of_best_route(matrix=matrix, starting_point=Point(0, 0))
+        assert lowest_risk(matrix) <= monotone
+
+
+def test_lowest_risk_goes_up_and_left():
+    matrix = ((1, 1, 1), (9, 9, 1), (1, 1, 1), (1, 9, 9), (1, 1, 1))
+    assert lowest_risk(matrix) == 10
 
 
 def part_a(filepath: str):
-    with open(filepath, "r") as file:
-        matrix = list_matrix_to_tuple_matrix(parse_digit_matrix(file.read()))
-    return find_risk_of_best_route(matrix=matrix, starting_point=Point(0, 0))
+    with open(filepath, "rb") as file:
+        matrix = DigitGrid.from_bytes(file.read()).to_tuples()
+    return lowest_risk(matrix)
 
 
 def part_b(filepath: str):
-    with open(filepath, "r") as file:
-        matrix = list_matrix_to_tuple_matrix(parse_digit_matrix(file.read()))
+    with open(filepath, "rb") as file:
+        matrix = DigitGrid.from_bytes(file.read()).to_tuples()
     return find_best_path_on_multiplied_matrix(matrix)
 
 
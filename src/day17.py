@@ -1,7 +1,6 @@
 from typing import NamedTuple, Set
 
-import pytest
-
+from src.lazy_pytest import pytest
 from src.aoc_helpers import Point
 
 
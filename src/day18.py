@@ -1,8 +1,8 @@
-import json
 import math
-from typing import Union, Tuple, NamedTuple, Optional, List
+from typing import Union, Tuple, NamedTuple, Optional, List, Iterable
 
-import pytest
+from src.lazy_pytest import pytest
+from src.aoc_helpers import iter_lines, parse_lines, decode_json, stream_file
 
 
 @pytest.mark.parametrize(
@@ -18,11 +18,11 @@ def test_parse_input(input_string, expected):
 
 
 def parse_input(input_string: str):
-    return [parse_line(line) for line in input_string.strip().split("\n")]
+    return list(parse_lines(iter_lines(input_string), parse_line))
 
 
 def parse_line(line: str):
-    return nested_lists_to_nested_tuples(json.loads(line))
+    return nested_lists_to_nested_tuples(decode_json(line))
 
 
 def nested_lists_to_nested_tuples(as_list):
@@ -346,9 +346,10 @@ def test_sfn_reduce(sfn, expected):
     assert sfn_reduce(sfn) == expected
 
 
-def add_and_reduce_many_sfns(sfns: List[Tuple]):
-    result = sfns[0]
-    for sfn in sfns[1:]:
+def add_and_reduce_many_sfns(sfns: Iterable[Tuple]):
+    sfns = iter(sfns)
+    result = next(sfns)
+    for sfn in sfns:
         result = sfn_reduce(sfn_add(result, sfn))
     return result
 
@@ -433,9 +434,7 @@ def test_do_homework_part_2():
 
 
 def part_a(filepath: str):
-    with open(filepath, "r") as file:
-        sfns = parse_input(file.read())
-    return do_homework(sfns)
+    return do_homework(stream_file(filepath, parse_line))
 
 
 def part_b(filepath: str):
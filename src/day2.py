@@ -1,7 +1,41 @@
+import itertools
+import operator
+import random
+import struct
+from array import array
 from collections import defaultdict
-from typing import Tuple, List, Dict, NamedTuple
+from typing import (
+    Callable,
+    Tuple,
+    List,
+    Dict,
+    NamedTuple,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+)
+
+from src.lazy_pytest import pytest
+from src.aoc_helpers import (
+    iter_lines,
+    parse_lines,
+    decode_word_int,
+    map_file_chunks,
+    read_byte_range,
+    MappedInput,
+    little_endian,
+    from_little_endian,
+)
 
-import pytest
+FORWARD, DOWN, UP = range(3)
+OPCODES = {"forward": FORWARD, "down": DOWN, "up": UP}
+BYTE_OPCODES = {command.encode(): opcode for command, opcode in OPCODES.items()}
+# Commands compiled and folded per chunk by the streaming entry points
+COMMAND_CHUNK = 1 << 12
+# What one unit of each opcode adds to horizontal and to aim, indexed by opcode
+HORIZONTAL_WEIGHTS = (1, 0, 0)
+AIM_WEIGHTS = (0, 1, -1)
 
 
 @pytest.mark.parametrize(
@@ -20,13 +54,7 @@ def test_parse_input(input_string, expected_list):
 
 
 def parse_input(input_string: str) -> List[Tuple[str, int]]:
-    if not input_string:
-        return []
-    result = []
-    for line in input_string.strip().split("\n"):
-        line_split = line.split(" ")
-        result.append((line_split[0], int(line_split[1])))
-    return result
+    return list(parse_lines(iter_lines(input_string), decode_word_int))
 
 
 @pytest.mark.parametrize(
@@ -42,7 +70,7 @@ def test_sum_by_type(vector_list, expected):
     assert sum_by_type(vector_list) == expected
 
 
-def sum_by_type(vector_list: List[Tuple[str, int]]) -> Dict[str, int]:
+def sum_by_type(vector_list: Iterable[Tuple[str, int]]) -> Dict[str, int]:
     result = defaultdict(lambda: 0)
     for vector in vector_list:
         result[vector[0]] += vector[1]
@@ -149,27 +177,409 @@ def test_calculate_final_submarine_state():
     )
 
 
-def calculate_final_submarine_state(vectors: List[Tuple[str, int]]) -> SubmarineState:
-    result = SubmarineState()
+def calculate_final_submarine_state(
+    vectors: Iterable[Tuple[str, int]]
+) -> SubmarineState:
+    # Compiles and folds a bounded chunk at a time, so an iterator of commands is
+    # never held whole
+    vectors = iter(vectors)
+    summary = SegmentSummary()
+    while True:
+        commands = CompiledCommands.from_vectors(
+            itertools.islice(vectors, COMMAND_CHUNK)
+        )
+        if not len(commands):
+            return SubmarineState(*summary)
+        summary = summary.combine(SegmentSummary.of(commands))
+
+
+def replay_submarine_state(
+    vectors: Iterable[Tuple[str, int]], initial_state: SubmarineState = SubmarineState()
+) -> SubmarineState:
+    result = initial_state
     for vector in vectors:
         result = update_submarine_state(initial_state=result, vector=vector)
     return result
 
 
+class CompiledCommands:
+    # Commands interned to opcodes at parse time and kept as two parallel arrays
+    __slots__ = ("opcodes", "amounts")
+
+    def __init__(self, opcodes: array, amounts: array):
+        if len(opcodes) != len(amounts):
+            raise ValueError("Every opcode needs exactly one amount")
+        self.opcodes = opcodes
+        self.amounts = amounts
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Tuple[str, int]]) -> "CompiledCommands":
+        opcodes = array("B")
+        amounts = array("q")
+        for command, amount in vectors:
+            if command not in OPCODES:
+                raise ValueError(f"Unknown submarine command {command!r}")
+            opcodes.append(OPCODES[command])
+            amounts.append(amount)
+        return cls(opcodes, amounts)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CompiledCommands":
+        tokens = raw.split()
+        if len(tokens) % 2:
+            raise ValueError("Every command needs exactly one amount")
+        try:
+            opcodes = array("B", map(BYTE_OPCODES.__getitem__, tokens[::2]))
+        except KeyError as e:
+            raise ValueError(f"Unknown submarine command {e.args[0]!r}") from None
+        return cls(opcodes, array("q", map(int, tokens[1::2])))
+
+    @classmethod
+    def from_file(cls, filepath: str) -> "CompiledCommands":
+        with open(filepath, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def segment(self, start: int, stop: int) -> "CompiledCommands":
+        return CompiledCommands(self.opcodes[start:stop], self.amounts[start:stop])
+
+    def horizontal_steps(self) -> Iterator[int]:
+        return map(
+            operator.mul,
+            map(HORIZONTAL_WEIGHTS.__getitem__, self.opcodes),
+            self.amounts,
+        )
+
+    def aim_steps(self) -> Iterator[int]:
+        return map(
+            operator.mul, map(AIM_WEIGHTS.__getitem__, self.opcodes), self.amounts
+        )
+
+    def final_state(self) -> SubmarineState:
+        # Aim after each command is a prefix sum of the aim steps, and depth is the
+        # dot product of the forward amounts with that running aim
+        aims = array("q", itertools.accumulate(self.aim_steps()))
+        horizontal_steps = array("q", self.horizontal_steps())
+        return SubmarineState(
+            horizontal=sum(horizontal_steps),
+            depth=sum(map(operator.mul, horizontal_steps, aims)),
+            aim=aims[-1] if aims else 0,
+        )
+
+
+class SegmentSummary(NamedTuple):
+    # What a run of commands does to a submarine that starts it with aim 0. Any
+    # starting aim only adds aim * horizontal to the depth, which is what makes
+    # combining summaries associative.
+    horizontal: int = 0
+    depth: int = 0
+    aim: int = 0
+
+    @classmethod
+    def of(cls, commands: CompiledCommands) -> "SegmentSummary":
+        return cls(*commands.final_state())
+
+    def combine(self, later: "SegmentSummary") -> "SegmentSummary":
+        return SegmentSummary(
+            horizontal=self.horizontal + later.horizontal,
+            depth=self.depth + later.depth + self.aim * later.horizontal,
+            aim=self.aim + later.aim,
+        )
+
+    def apply(self, state: SubmarineState) -> SubmarineState:
+        return SubmarineState(*SegmentSummary(*state).combine(self))
+
+
+def tree_reduce(summaries: Sequence[SegmentSummary]) -> SegmentSummary:
+    # Combine neighbours pairwise, level by level; order is kept, grouping is free
+    level = list(summaries) or [SegmentSummary()]
+    while len(level) > 1:
+        paired = [a.combine(b) for a, b in zip(level[::2], level[1::2])]
+        level = paired + level[len(paired) * 2 :]
+    return level[0]
+
+
+def summarise_byte_range(filepath: str, byte_range: Tuple[int, int]) -> SegmentSummary:
+    return SegmentSummary.of(
+        CompiledCommands.from_bytes(read_byte_range(filepath, byte_range))
+    )
+
+
+def summarise_file(
+    filepath: str, chunks: Optional[int] = None, workers: Optional[int] = None
+) -> SegmentSummary:
+    return tree_reduce(
+        map_file_chunks(summarise_byte_range, filepath, chunks=chunks, workers=workers)
+    )
+
+
+def fold_file(filepath: str, chunk_size: int = 1 << 16) -> SegmentSummary:
+    # Streams the log in newline-cut chunks, carrying the summary between them, so
+    # memory stays at one chunk however long the log is
+    summary = SegmentSummary()
+    with MappedInput(filepath) as mapped:
+        for chunk in mapped.chunks(chunk_size):
+            commands = CompiledCommands.from_bytes(chunk)
+            summary = summary.combine(SegmentSummary.of(commands))
+    return summary
+
+
+def summarise_files(
+    filepaths: Iterable[str], workers: Optional[int] = None
+) -> SegmentSummary:
+    # Logs split across files, in order, merge like chunks of one file
+    return tree_reduce([summarise_file(path, workers=workers) for path in filepaths])
+
+
+@pytest.fixture
+def random_vectors() -> Callable[..., List[Tuple[str, int]]]:
+    def vectors(count: int, seed: int = 0) -> List[Tuple[str, int]]:
+        rng = random.Random(seed)
+        return [(rng.choice(list(OPCODES)), rng.randint(0, 9)) for _ in range(count)]
+
+    return vectors
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 10, 1000])
+def test_compiled_commands_match_replay(count, random_vectors):
+    vectors = random_vectors(count, seed=count)
+    expected = replay_submarine_state(vectors)
+    assert calculate_final_submarine_state(vectors) == expected
+    raw = "\n".join(f"{command} {amount}" for command, amount in vectors).encode()
+    assert CompiledCommands.from_bytes(raw).final_state() == expected
+
+
+def test_segment_summaries_combine_associatively(random_vectors):
+    vectors = random_vectors(300, seed=3)
+    pieces = [vectors[:17], vectors[17:18], vectors[18:150], [], vectors[150:]]
+    summaries = [SegmentSummary.of(CompiledCommands.from_vectors(p)) for p in pieces]
+    expected = replay_submarine_state(vectors)
+    assert SubmarineState(*tree_reduce(summaries)) == expected
+    left_first = summaries[0].combine(summaries[1]).combine(summaries[2])
+    right_first = summaries[0].combine(summaries[1].combine(summaries[2]))
+    assert left_first == right_first
+    start = SubmarineState(3, 4, 5)
+    assert tree_reduce(summaries).apply(start) == replay_submarine_state(vectors, start)
+
+
+@pytest.mark.parametrize("chunks", [1, 2, 7, 1000])
+def test_summarise_file_matches_replay(tmp_path, chunks, random_vectors):
+    vectors = random_vectors(200, seed=chunks)
+    filepath = tmp_path / "day2.txt"
+    filepath.write_text("".join(f"{command} {amount}\n" for command, amount in vectors))
+    expected = replay_submarine_state(vectors)
+    assert summarise_file(str(filepath), chunks=chunks, workers=1) == expected
+    halves = [tmp_path / "first.txt", tmp_path / "second.txt"]
+    for half, part in zip(halves, (vectors[:77], vectors[77:])):
+        half.write_text("".join(f"{command} {amount}\n" for command, amount in part))
+    assert summarise_files([str(half) for half in halves], workers=1) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 10, 1 << 16])
+def test_fold_file_matches_replay(tmp_path, chunk_size, random_vectors):
+    vectors = random_vectors(300, seed=chunk_size)
+    filepath = tmp_path / "day2.txt"
+    filepath.write_text("".join(f"{command} {amount}\n" for command, amount in vectors))
+    assert fold_file(str(filepath), chunk_size) == replay_submarine_state(vectors)
+
+
+def test_calculate_final_submarine_state_streams_an_iterator(random_vectors):
+    vectors = random_vectors(3 * COMMAND_CHUNK + 5, seed=5)
+    expected = replay_submarine_state(vectors)
+    assert calculate_final_submarine_state(iter(vectors)) == expected
+
+
+def test_summarise_file_in_a_process_pool(tmp_path, random_vectors):
+    vectors = random_vectors(200, seed=1)
+    filepath = tmp_path / "day2.txt"
+    filepath.write_text("".join(f"{command} {amount}\n" for command, amount in vectors))
+    summary = summarise_file(str(filepath), chunks=5, workers=2)
+    assert summary == replay_submarine_state(vectors)
+
+
+@pytest.mark.parametrize("raw", [b"sideways 3", b"forward 3\ndown", b"forward"])
+def test_compiled_commands_reject_bad_input(raw):
+    with pytest.raises(ValueError):
+        CompiledCommands.from_bytes(raw)
+
+
+class Trajectory(NamedTuple):
+    # Columnar: row i is the state after command i
+    horizontal: array
+    depth: array
+    aim: array
+
+    def __len__(self) -> int:
+        return len(self.horizontal)
+
+    def state(self, index: int) -> SubmarineState:
+        return SubmarineState(
+            self.horizontal[index], self.depth[index], self.aim[index]
+        )
+
+
+def trajectory_columns(
+    commands: CompiledCommands, initial_state: SubmarineState = SubmarineState()
+) -> Trajectory:
+    # Each running sum starts from the initial state, whose row is then dropped
+    horizontal_steps = array("q", commands.horizontal_steps())
+    aims = array(
+        "q", itertools.accumulate(commands.aim_steps(), initial=initial_state.aim)
+    )
+    horizontals = itertools.accumulate(
+        horizontal_steps, initial=initial_state.horizontal
+    )
+    depths = itertools.accumulate(
+        map(operator.mul, horizontal_steps, aims), initial=initial_state.depth
+    )
+    return Trajectory(
+        horizontal=array("q", horizontals)[1:],
+        depth=array("q", depths)[1:],
+        aim=aims[1:],
+    )
+
+
+def iter_trajectory_chunks(
+    commands: CompiledCommands, chunk_size: int = 1 << 16
+) -> Iterator[Trajectory]:
+    # Only one chunk of columns is alive at a time; each picks up where the last
+    # one's final state left off
+    state = SubmarineState()
+    for start in range(0, len(commands), chunk_size):
+        chunk = trajectory_columns(commands.segment(start, start + chunk_size), state)
+        state = chunk.state(-1)
+        yield chunk
+
+
+TRAJECTORY_MAGIC = b"AOCTRAJ1"
+# Magic, number of rows, rows per chunk; then each chunk's horizontal, depth and
+# aim columns as little-endian int64, every chunk but the last one full size
+TRAJECTORY_HEADER = struct.Struct("<8sqq")
+
+
+def write_trajectory(
+    commands: CompiledCommands, filepath: str, chunk_size: int = 1 << 16
+) -> None:
+    with open(filepath, "wb") as file:
+        file.write(TRAJECTORY_HEADER.pack(TRAJECTORY_MAGIC, len(commands), chunk_size))
+        for chunk in iter_trajectory_chunks(commands, chunk_size):
+            for column in chunk:
+                file.write(little_endian(column))
+
+
+class TrajectoryFile:
+    def __init__(self, filepath: str):
+        self._file = open(filepath, "rb")
+        magic, self.rows, self.chunk_size = TRAJECTORY_HEADER.unpack(
+            self._file.read(TRAJECTORY_HEADER.size)
+        )
+        if magic != TRAJECTORY_MAGIC:
+            raise ValueError(f"{filepath} is not a trajectory file")
+
+    def __enter__(self) -> "TrajectoryFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _chunk_layout(self, chunk: int) -> Tuple[int, int]:
+        # Chunks before this one are all full size, so its offset is a product
+        first_row = chunk * self.chunk_size
+        offset = TRAJECTORY_HEADER.size + first_row * 3 * 8
+        return offset, min(self.chunk_size, self.rows - first_row)
+
+    def chunk(self, chunk: int) -> Trajectory:
+        offset, rows = self._chunk_layout(chunk)
+        self._file.seek(offset)
+        return Trajectory(
+            *(from_little_endian("q", self._file.read(rows * 8)) for _ in range(3))
+        )
+
+    def chunks(self) -> Iterator[Trajectory]:
+        return (self.chunk(i) for i in range(-(-self.rows // self.chunk_size)))
+
+    def state_at(self, index: int) -> SubmarineState:
+        if not 0 <= index < self.rows:
+            raise IndexError(f"Row {index} is outside a {self.rows} row trajectory")
+        chunk, row = divmod(index, self.chunk_size)
+        offset, rows = self._chunk_layout(chunk)
+        values = []
+        for column in range(3):
+            self._file.seek(offset + (column * rows + row) * 8)
+            values.append(struct.unpack("<q", self._file.read(8))[0])
+        return SubmarineState(*values)
+
+
+class TrajectoryCheckpoints:
+    # Random access without materialising the trajectory: keeps the state before
+    # every `every`-th command and folds at most `every` commands from there
+    def __init__(self, commands: CompiledCommands, every: int = 1 << 12):
+        self.commands = commands
+        self.every = every
+        self.checkpoints = [SubmarineState()]
+        for start in range(every, len(commands), every):
+            segment = SegmentSummary.of(commands.segment(start - every, start))
+            self.checkpoints.append(segment.apply(self.checkpoints[-1]))
+
+    def state_at(self, index: int) -> SubmarineState:
+        if not 0 <= index < len(self.commands):
+            raise IndexError(f"Command {index} is outside {len(self.commands)}")
+        block = index // self.every
+        segment = self.commands.segment(block * self.every, index + 1)
+        return SegmentSummary.of(segment).apply(self.checkpoints[block])
+
+
+def test_trajectory_columns_match_replay(random_vectors):
+    vectors = random_vectors(100, seed=5)
+    trajectory = trajectory_columns(CompiledCommands.from_vectors(vectors))
+    expected = [replay_submarine_state(vectors[: i + 1]) for i in range(len(vectors))]
+    assert [trajectory.state(i) for i in range(len(trajectory))] == expected
+    assert len(trajectory_columns(CompiledCommands.from_vectors([]))) == 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 1000])
+def test_trajectory_file_round_trip(tmp_path, chunk_size, random_vectors):
+    commands = CompiledCommands.from_vectors(random_vectors(100, seed=6))
+    expected = trajectory_columns(commands)
+    write_trajectory(commands, str(tmp_path / "trajectory.bin"), chunk_size)
+    with TrajectoryFile(str(tmp_path / "trajectory.bin")) as trajectory:
+        assert len(trajectory) == 100
+        for column, expected_column in zip(zip(*trajectory.chunks()), expected):
+            assert array("q", itertools.chain(*column)) == expected_column
+        for index in (0, 1, 6, 7, 50, 99):
+            assert trajectory.state_at(index) == expected.state(index)
+        with pytest.raises(IndexError):
+            trajectory.state_at(100)
+
+
+@pytest.mark.parametrize("every", [1, 3, 64])
+def test_trajectory_checkpoints(every, random_vectors):
+    commands = CompiledCommands.from_vectors(random_vectors(100, seed=7))
+    expected = trajectory_columns(commands)
+    checkpoints = TrajectoryCheckpoints(commands, every)
+    for index in range(100):
+        assert checkpoints.state_at(index) == expected.state(index)
+
+
 def day_2a(filepath: str):
-    with open(filepath, "r") as file:
-        vector_list = parse_input(file.read())
-    direction_by_type = sum_by_type(vector_list)
-    horizontal = direction_by_type.get("forward") or 0
-    depth = calculate_depth(direction_by_type)
+    # Without aim, plain depth is exactly what the aim ends up as
+    final_submarine_state = fold_file(filepath)
+    horizontal = final_submarine_state.horizontal
+    depth = final_submarine_state.aim
     print(f"Horizontal = {horizontal}, Depth = {depth}")
     return horizontal * depth
 
 
 def day_2b(filepath: str):
-    with open(filepath, "r") as file:
-        vector_list = parse_input(file.read())
-    final_submarine_state = calculate_final_submarine_state(vector_list)
+    final_submarine_state = fold_file(filepath)
     print(
         f"Horizontal = {final_submarine_state.horizontal}, Depth = {final_submarine_state.depth}"
     )
@@ -2,7 +2,11 @@ import functools
 from collections import defaultdict
 from typing import NamedTuple, Tuple, List, Dict
 
-import pytest
+from src.lazy_pytest import pytest
+from src.dispatch import Strategy, dispatch
+
+# Simulating one turn at a time is quick enough up to scores around here
+SIMULATED_TARGET_MAX_SCORE = 10000
 
 
 class PlayerState(NamedTuple):
@@ -289,6 +293,76 @@ def run_turns_until_score(game_state: GameState, target_score: int) -> GameState
     return game_state
 
 
+def run_turns_skipping_cycles(game_state: GameState, target_score: int) -> GameState:
+    # Each turn moves the current player by 3 * roll_count + 6, so positions only
+    # depend on roll_count mod 10 and the game soon repeats a cycle of turns that
+    # adds the same score to each player. Whole cycles are skipped while nobody
+    # could reach the target inside them, and the rest is simulated.
+    seen = {}
+    while not score_reached(game_state, target_score):
+        key = (
+            tuple(player.position for player in game_state.player_states),
+            game_state.player_turn,
+            game_state.roll_count % 10,
+        )
+        if key in seen:
+            return run_turns_until_score(
+                skip_cycles(seen[key], game_state, target_score), target_score
+            )
+        seen[key] = game_state
+        game_state = one_turn(game_state)
+    return game_state
+
+
+def skip_cycles(
+    cycle_start: GameState, cycle_end: GameState, target_score: int
+) -> GameState:
+    gains = [
+        end.score - start.score
+        for start, end in zip(cycle_start.player_states, cycle_end.player_states)
+    ]
+    cycles = min(
+        (target_score - 1 - player.score) // gain
+        for player, gain in zip(cycle_end.player_states, gains)
+    )
+    return cycle_end._replace(
+        roll_count=cycle_end.roll_count
+        + cycles * (cycle_end.roll_count - cycle_start.roll_count),
+        player_states=tuple(
+            player._replace(score=player.score + cycles * gain)
+            for player, gain in zip(cycle_end.player_states, gains)
+        ),
+    )
+
+
+def run_deterministic_game(game_state: GameState, target_score: int) -> GameState:
+    return dispatch(
+        "day21 deterministic game",
+        target_score,
+        [
+            Strategy("turn by turn", run_turns_until_score, SIMULATED_TARGET_MAX_SCORE),
+            Strategy("cycle skipping", run_turns_skipping_cycles),
+        ],
+        game_state,
+        target_score,
+    )
+
+
+@pytest.mark.parametrize("target_score", [1, 10, 21, 100, 1000, 4321])
+@pytest.mark.parametrize("positions", [(4, 8), (10, 8), (1, 1), (7, 2)])
+def test_deterministic_game_strategies_agree(positions, target_score):
+    game_state = GameState.factory(pos_zero=positions[0], pos_one=positions[1])
+    simulated = run_turns_until_score(game_state, target_score)
+    assert run_turns_skipping_cycles(game_state, target_score) == simulated
+
+
+def test_run_deterministic_game_on_a_huge_target():
+    game_state = GameState.factory(pos_zero=4, pos_one=8)
+    final_state = run_deterministic_game(game_state, 10**12)
+    assert max(player.score for player in final_state.player_states) >= 10**12
+    assert min(player.score for player in final_state.player_states) < 10**12
+
+
 def score_reached(game_state, target_score):
     for player in game_state.player_states:
         if player.score >= target_score:
@@ -338,7 +412,7 @@ def aoc_input() -> GameState:
 
 
 def part_a():
-    final_game_state = run_turns_until_score(game_state=aoc_input(), target_score=1000)
+    final_game_state = run_deterministic_game(game_state=aoc_input(), target_score=1000)
     return final_game_state.game_score()
 
 
@@ -1,7 +1,25 @@
+import operator
+import random
+import struct
+from array import array
+from bisect import bisect_left
+from itertools import repeat
 from statistics import mode
-from typing import Tuple, List, Callable
+from typing import Tuple, List, Callable, Iterable, Iterator, Optional, Sequence
+
+from src.lazy_pytest import pytest
+from src.aoc_helpers import (
+    DIGIT_VALUES,
+    MappedInput,
+    iter_lines,
+    decode_digits,
+    little_endian,
+    from_little_endian,
+)
 
-import pytest
+# Rows up to this wide pack into array("Q"), wider ones stay Python ints
+WORD_BITS = 64
+BIT_CHARS = bytes.maketrans(b"\x00\x01", b"01")
 
 
 @pytest.mark.parametrize(
@@ -30,10 +48,10 @@ def test_parse_input(input_string, expected_list):
 
 
 def parse_input(input_string: str) -> List[Tuple[int]]:
-    result = []
-    for line in input_string.strip().split("\n"):
-        result.append(tuple(int(char) for char in line.strip()))
-    return result
+    # Blank lines decode to empty rows rather than being skipped as parse_lines would,
+    # which is what an empty report has always parsed to
+    lines = iter_lines(input_string.strip())
+    return [decode_digits(line.strip()) for line in lines]
 
 
 @pytest.mark.parametrize(
@@ -124,12 +142,7 @@ def test_binary_to_int(binary_input, expected):
 
 
 def binary_to_int(binary_input):
-    result = 0
-    current_position_value = 1
-    for bit in reversed(binary_input):
-        result += current_position_value * bit
-        current_position_value *= 2
-    return result
+    return int(bytes(binary_input).translate(BIT_CHARS) or b"0", 2)
 
 
 def gamma_rate(most_common_bits: Tuple[int]) -> int:
@@ -254,27 +267,470 @@ def co2_filter(data, position):
     return [value for value in data if value[position] == filter_bit]
 
 
+def pack_rows(rows: Iterable[int], width: int) -> Sequence[int]:
+    return array("Q", rows) if width <= WORD_BITS else list(rows)
+
+
+def majority_bits(counts: Iterable[int], total: int) -> int:
+    # Ties go to 1, as in mode_with_tiebreaker
+    return binary_to_int(bytes(2 * ones >= total for ones in counts))
+
+
+def sliced_column_counts(rows: Iterable[int], width: int) -> List[int]:
+    # Bit-sliced counters: planes[k] holds bit k of every column's count at once, so
+    # adding a row is a ripple carry over whole-row ints rather than a loop over its
+    # bits, and each step works a machine word at a time
+    planes = []  # type: List[int]
+    for row in rows:
+        carry = row
+        for k, plane in enumerate(planes):
+            planes[k] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        else:
+            if carry:
+                planes.append(carry)
+    counts = [0] * width
+    for k, plane in enumerate(planes):
+        digits = format(plane, f"0{width}b").encode().translate(DIGIT_VALUES)
+        counts = list(
+            map(operator.add, counts, map(operator.lshift, digits, repeat(k)))
+        )
+    return counts
+
+
+@pytest.mark.parametrize("width", [1, 5, 64, 65, 300])
+def test_sliced_column_counts(width):
+    rows = [random.Random(row).getrandbits(width) for row in range(150)]
+    bits = b"".join(format(row, f"0{width}b").encode() for row in rows)
+    expected = [bits[column::width].count(b"1") for column in range(width)]
+    assert sliced_column_counts(rows, width) == expected
+    assert sliced_column_counts([], width) == [0] * width
+
+
+class PackedReport:
+    # Each row as an unsigned int, first character most significant, and how many
+    # rows have a 1 in each column. Both are built a chunk of input at a time, so the
+    # raw text is never held whole.
+    __slots__ = ("width", "rows", "counts")
+
+    def __init__(
+        self, width: int, rows: Sequence[int], counts: Optional[List[int]] = None
+    ):
+        if counts is not None and len(counts) != width:
+            raise ValueError(f"{len(counts)} column counts for rows of {width}")
+        self.width = width
+        self.rows = rows
+        self.counts = sliced_column_counts(rows, width) if counts is None else counts
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[bytes]) -> "PackedReport":
+        width = 0
+        rows = pack_rows((), width)
+        counts = []  # type: List[int]
+        for chunk in chunks:
+            lines = chunk.split()
+            if not lines:
+                continue
+            if not rows:
+                width = len(lines[0])
+                rows = pack_rows((), width)
+                counts = [0] * width
+            if any(len(line) != width for line in lines):
+                raise ValueError("Report rows must all be the same width")
+            bits = b"".join(lines)
+            if bits.translate(None, b"01"):
+                raise ValueError("Report rows may only contain 0 and 1")
+            chunk_rows = pack_rows((int(line, 2) for line in lines), width)
+            rows.extend(chunk_rows)
+            if width > WORD_BITS:
+                chunk_counts = sliced_column_counts(chunk_rows, width)
+            else:
+                # One strided slice and a C-level count per column, not one per bit
+                chunk_counts = [
+                    bits[column::width].count(b"1") for column in range(width)
+                ]
+            counts = list(map(operator.add, counts, chunk_counts))
+        return cls(width, rows, counts)
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "PackedReport":
+        return cls.from_chunks([raw])
+
+    @classmethod
+    def from_file(cls, filepath: str, chunk_size: int = 1 << 16) -> "PackedReport":
+        with MappedInput(filepath) as mapped:
+            return cls.from_chunks(mapped.chunks(chunk_size))
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column_counts(self) -> List[int]:
+        return list(self.counts)
+
+    def gamma(self) -> int:
+        return majority_bits(self.counts, len(self))
+
+    def epsilon(self) -> int:
+        return self.gamma() ^ ((1 << self.width) - 1)
+
+
+@pytest.fixture
+def aoc_example_bytes() -> bytes:
+    return b"""00100
+11110
+10110
+10111
+10101
+01111
+00111
+11100
+10000
+11001
+00010
+01010"""
+
+
+def test_packed_report(aoc_example_bytes):
+    report = PackedReport.from_bytes(aoc_example_bytes)
+    assert (report.width, len(report)) == (5, 12)
+    assert report.rows[:2] == array("Q", [0b00100, 0b11110])
+    assert report.column_counts() == [7, 5, 8, 7, 5]
+    assert (report.gamma(), report.epsilon()) == (22, 9)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_packed_report_from_file(tmp_path, chunk_size, aoc_example_bytes):
+    (tmp_path / "day3.txt").write_bytes(aoc_example_bytes + b"\n")
+    report = PackedReport.from_file(str(tmp_path / "day3.txt"), chunk_size)
+    expected = PackedReport.from_bytes(aoc_example_bytes)
+    assert (report.rows, report.counts) == (expected.rows, expected.counts)
+    assert report.counts == sliced_column_counts(report.rows, report.width)
+
+
+@pytest.mark.parametrize("raw", [b"101\n10", b"102", b"1" * 65 + b"\n" + b"1" * 64])
+def test_packed_report_rejects_bad_rows(raw):
+    with pytest.raises(ValueError):
+        PackedReport.from_bytes(raw)
+
+
+def test_packed_report_matches_most_common_bit_list():
+    data = [tuple((i * 2654435761 >> bit) & 1 for bit in range(9)) for i in range(200)]
+    raw = "\n".join("".join(map(str, row)) for row in data).encode()
+    report = PackedReport.from_bytes(raw)
+    assert report.gamma() == gamma_rate(most_common_bit_list(data))
+    assert report.epsilon() == epsilon_rate(most_common_bit_list(data))
+
+
+class RatingIndex:
+    # The rows sorted once. Rows sharing a prefix are then a contiguous [lo, hi), and
+    # within it the rows with the next bit set start at a single binary search.
+    __slots__ = ("width", "rows")
+
+    def __init__(self, width: int, rows: Iterable[int]):
+        self.width = width
+        self.rows = pack_rows(sorted(rows), width)
+
+    @classmethod
+    def from_report(cls, report: PackedReport) -> "RatingIndex":
+        return cls(report.width, report.rows)
+
+    def rating(self, keep_most_common: bool) -> int:
+        rows = self.rows
+        lo, hi = 0, len(rows)
+        if not rows:
+            raise ValueError("Cannot rate an empty report")
+        for bit in reversed(range(self.width)):
+            if hi - lo == 1:
+                break
+            prefix = rows[lo] >> (bit + 1) << (bit + 1)
+            split = bisect_left(rows, prefix | (1 << bit), lo, hi)
+            zeros, ones = split - lo, hi - split
+            if not zeros or not ones:
+                continue
+            if (ones >= zeros) == keep_most_common:
+                lo = split
+            else:
+                hi = split
+        return rows[lo]
+
+    def oxygen(self) -> int:
+        return self.rating(keep_most_common=True)
+
+    def co2(self) -> int:
+        return self.rating(keep_most_common=False)
+
+
+def life_support_ratings(reports: Iterable[PackedReport]) -> List[Tuple[int, int]]:
+    ratings = []
+    for report in reports:
+        index = RatingIndex.from_report(report)
+        ratings.append((index.oxygen(), index.co2()))
+    return ratings
+
+
+@pytest.fixture
+def random_rows() -> Callable[[int, int, int], List[int]]:
+    def rows(count: int, width: int, seed: int) -> List[int]:
+        return random.Random(seed).sample(range(1 << width), count)
+
+    return rows
+
+
+def to_tuple(row: int, width: int) -> Tuple[int, ...]:
+    return tuple((row >> bit) & 1 for bit in reversed(range(width)))
+
+
+def test_rating_index(aoc_example_bytes):
+    index = RatingIndex.from_report(PackedReport.from_bytes(aoc_example_bytes))
+    assert (index.oxygen(), index.co2()) == (23, 10)
+    assert (RatingIndex(3, [5]).oxygen(), RatingIndex(3, [5]).co2()) == (5, 5)
+    with pytest.raises(ValueError):
+        RatingIndex(3, []).oxygen()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rating_index_matches_filter_to_one(seed, random_rows):
+    rows = random_rows(100, 10, seed)
+    data = [to_tuple(row, 10) for row in rows]
+    index = RatingIndex(10, rows)
+    assert index.oxygen() == binary_to_int(filter_to_one(data, oxygen_filter))
+    try:
+        expected_co2 = binary_to_int(filter_to_one(data, co2_filter))
+    except IndexError:
+        # The list filter empties itself when every remaining row shares a bit
+        return
+    assert index.co2() == expected_co2
+
+
+def test_life_support_ratings(aoc_example_bytes):
+    reports = [
+        PackedReport.from_bytes(aoc_example_bytes),
+        PackedReport.from_bytes(b"01"),
+    ]
+    assert life_support_ratings(reports) == [(23, 10), (1, 1)]
+
+
+DIAGNOSTIC_MAGIC = b"AOCDIAG1"
+# Magic, width, trie nodes; then the column one-counts, the children and the node
+# counts, all little-endian int64
+DIAGNOSTIC_HEADER = struct.Struct("<8sqq")
+
+
+class DiagnosticStream:
+    # Column one-counts plus a binary trie over the rows, both kept up to date as
+    # rows come and go. Node 0 is the root, children[2 * node + bit] is the child
+    # under that bit (0 for none yet) and counts[node] is how many rows pass through
+    # it. Nodes emptied by remove stay in place to be reused by later rows.
+    __slots__ = ("width", "ones", "children", "counts")
+
+    def __init__(self, width: int):
+        if width < 1:
+            raise ValueError(f"Rows must be at least one bit wide, not {width}")
+        self.width = width
+        self.ones = array("q", [0]) * width
+        self.children = array("q", [0, 0])
+        self.counts = array("q", [0])
+
+    def __len__(self) -> int:
+        return self.counts[0]
+
+    def _path(self, row: int) -> Iterator[Tuple[int, int]]:
+        # (column, bit) pairs from the leftmost column on
+        for column, shift in enumerate(reversed(range(self.width))):
+            yield column, (row >> shift) & 1
+
+    def add(self, row: int):
+        if not 0 <= row < 1 << self.width:
+            raise ValueError(f"{row} does not fit in {self.width} bits")
+        children, counts = self.children, self.counts
+        node = 0
+        counts[0] += 1
+        for column, bit in self._path(row):
+            self.ones[column] += bit
+            child = children[2 * node + bit]
+            if not child:
+                child = len(counts)
+                children[2 * node + bit] = child
+                children.extend((0, 0))
+                counts.append(0)
+            counts[child] += 1
+            node = child
+
+    def extend(self, rows: Iterable[int]):
+        for row in rows:
+            self.add(row)
+
+    def remove(self, row: int):
+        if not 0 <= row < 1 << self.width:
+            raise KeyError(row)
+        children, counts = self.children, self.counts
+        nodes = []
+        node = 0
+        for _, bit in self._path(row):
+            node = children[2 * node + bit]
+            if not node or not counts[node]:
+                raise KeyError(row)
+            nodes.append(node)
+        counts[0] -= 1
+        for node, (column, bit) in zip(nodes, self._path(row)):
+            counts[node] -= 1
+            self.ones[column] -= bit
+
+    def column_counts(self) -> List[int]:
+        return list(self.ones)
+
+    def gamma(self) -> int:
+        return majority_bits(self.ones, len(self))
+
+    def epsilon(self) -> int:
+        return self.gamma() ^ ((1 << self.width) - 1)
+
+    def rating(self, keep_most_common: bool) -> int:
+        if not len(self):
+            raise ValueError("Cannot rate an empty report")
+        children, counts = self.children, self.counts
+        node = result = 0
+        for _ in range(self.width):
+            zeros = counts[children[2 * node]] if children[2 * node] else 0
+            ones = counts[children[2 * node + 1]] if children[2 * node + 1] else 0
+            if not zeros or not ones:
+                bit = 1 if ones else 0
+            else:
+                bit = 1 if (ones >= zeros) == keep_most_common else 0
+            result = (result << 1) | bit
+            node = children[2 * node + bit]
+        return result
+
+    def oxygen(self) -> int:
+        return self.rating(keep_most_common=True)
+
+    def co2(self) -> int:
+        return self.rating(keep_most_common=False)
+
+    def save(self, filepath: str):
+        with open(filepath, "wb") as file:
+            file.write(
+                DIAGNOSTIC_HEADER.pack(DIAGNOSTIC_MAGIC, self.width, len(self.counts))
+            )
+            for column in (self.ones, self.children, self.counts):
+                file.write(little_endian(column))
+
+    @classmethod
+    def load(cls, filepath: str) -> "DiagnosticStream":
+        with open(filepath, "rb") as file:
+            magic, width, nodes = DIAGNOSTIC_HEADER.unpack(
+                file.read(DIAGNOSTIC_HEADER.size)
+            )
+            if magic != DIAGNOSTIC_MAGIC:
+                raise ValueError(f"{filepath} is not a diagnostic snapshot")
+            stream = cls(width)
+            stream.ones = from_little_endian("q", file.read(8 * width))
+            stream.children = from_little_endian("q", file.read(16 * nodes))
+            stream.counts = from_little_endian("q", file.read(8 * nodes))
+        return stream
+
+
+def test_diagnostic_stream(aoc_example_bytes):
+    report = PackedReport.from_bytes(aoc_example_bytes)
+    stream = DiagnosticStream(report.width)
+    stream.extend(report.rows)
+    assert len(stream) == 12
+    assert stream.column_counts() == report.column_counts()
+    assert (stream.gamma(), stream.epsilon()) == (report.gamma(), report.epsilon())
+    assert (stream.oxygen(), stream.co2()) == (23, 10)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_diagnostic_stream_tracks_removals(seed, random_rows):
+    rows = random_rows(200, 10, seed) * 2
+    stream = DiagnosticStream(10)
+    stream.extend(rows)
+    for removed in range(0, 390, 13):
+        for row in rows[removed : removed + 13]:
+            stream.remove(row)
+        remaining = rows[removed + 13 :]
+        report = PackedReport.from_bytes(
+            b"\n".join(format(row, "010b").encode() for row in remaining)
+        )
+        index = RatingIndex.from_report(report)
+        assert stream.column_counts() == report.column_counts()
+        assert stream.gamma() == report.gamma()
+        assert (stream.oxygen(), stream.co2()) == (index.oxygen(), index.co2())
+
+
+def test_diagnostic_stream_rejects_bad_rows():
+    stream = DiagnosticStream(3)
+    stream.add(0b101)
+    with pytest.raises(ValueError):
+        stream.add(0b1000)
+    for row in (0b100, 0b1000, -1):
+        with pytest.raises(KeyError):
+            stream.remove(row)
+    stream.remove(0b101)
+    with pytest.raises(KeyError):
+        stream.remove(0b101)
+    with pytest.raises(ValueError):
+        stream.oxygen()
+
+
+def test_diagnostic_stream_snapshot(tmp_path, aoc_example_bytes):
+    stream = DiagnosticStream(5)
+    stream.extend(PackedReport.from_bytes(aoc_example_bytes).rows)
+    stream.remove(0b10111)
+    stream.save(str(tmp_path / "stream.bin"))
+    restored = DiagnosticStream.load(str(tmp_path / "stream.bin"))
+    assert (restored.width, len(restored)) == (5, 11)
+    assert restored.column_counts() == stream.column_counts()
+    assert (restored.oxygen(), restored.co2()) == (stream.oxygen(), stream.co2())
+    restored.add(0b10111)
+    assert restored.oxygen() == 23
+    (tmp_path / "other.bin").write_bytes(bytes(DIAGNOSTIC_HEADER.size))
+    with pytest.raises(ValueError):
+        DiagnosticStream.load(str(tmp_path / "other.bin"))
+
+
+WIDE_WIDTH = 200
+
+
+@pytest.fixture(params=range(5))
+def wide_report(request) -> Tuple[List[Tuple[int, ...]], PackedReport]:
+    rng = random.Random(request.param)
+    rows = [rng.getrandbits(WIDE_WIDTH) for _ in range(60)]
+    data = [to_tuple(row, WIDE_WIDTH) for row in rows]
+    raw = b"\n".join(format(row, f"0{WIDE_WIDTH}b").encode() for row in rows)
+    return data, PackedReport.from_bytes(raw)
+
+
+def test_wide_report_matches_tuples(wide_report):
+    data, report = wide_report
+    assert report.width == WIDE_WIDTH
+    most_common_bits = most_common_bit_list(data)
+    assert report.gamma() == gamma_rate(most_common_bits)
+    assert report.epsilon() == epsilon_rate(most_common_bits)
+    index = RatingIndex.from_report(report)
+    assert index.oxygen() == binary_to_int(filter_to_one(data, oxygen_filter))
+    stream = DiagnosticStream(WIDE_WIDTH)
+    stream.extend(report.rows)
+    assert stream.column_counts() == report.column_counts()
+    assert (stream.oxygen(), stream.co2()) == (index.oxygen(), index.co2())
+
+
 def day3a(filepath: str):
-    with open(filepath, "r") as file:
-        binary_input_data = parse_input(file.read())
-    most_common_bits = most_common_bit_list(binary_input_data)
-    print(f"gamma = {gamma_rate(most_common_bits)}")
-    print(f"epsilon = {epsilon_rate(most_common_bits)}")
-    print(
-        f"gamma+epsilon = {gamma_rate(most_common_bits) + epsilon_rate(most_common_bits)}"
-    )
-    return gamma_rate(most_common_bits) * epsilon_rate(most_common_bits)
+    report = PackedReport.from_file(filepath)
+    gamma = report.gamma()
+    epsilon = report.epsilon()
+    print(f"gamma = {gamma}")
+    print(f"epsilon = {epsilon}")
+    print(f"gamma+epsilon = {gamma + epsilon}")
+    return gamma * epsilon
 
 
 def day3b(filepath: str):
-    with open(filepath, "r") as file:
-        binary_input_data = parse_input(file.read())
-    oxygen_value = binary_to_int(
-        filter_to_one(data=binary_input_data, a_filter=oxygen_filter)
-    )
-    co2_value = binary_to_int(
-        filter_to_one(data=binary_input_data, a_filter=co2_filter)
-    )
+    index = RatingIndex.from_report(PackedReport.from_file(filepath))
+    oxygen_value = index.oxygen()
+    co2_value = index.co2()
     print(f"oxygen = {oxygen_value}")
     print(f"co2 = {co2_value}")
     return oxygen_value * co2_value
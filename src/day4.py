@@ -1,7 +1,11 @@
+import random
+from array import array
+from collections import defaultdict
+from itertools import chain
 from statistics import mode
-from typing import Tuple, List, Callable
+from typing import Tuple, List, Callable, Dict, Iterable, Iterator, NamedTuple
 
-import pytest
+from src.lazy_pytest import pytest
 
 
 @pytest.mark.parametrize(
@@ -172,36 +176,218 @@ def test_board_score(bingo_board, updates, multiplier, expected):
     assert bingo_board.score(multiplier) == expected
 
 
-def day4a(filepath: str):
+class Win(NamedTuple):
+    board: int
+    number: int
+    score: int
+
+
+class BingoEngine:
+    # Every board's rows and columns are numbered as one global list of lines. The
+    # inverted index maps a number to the (board, row line, column line) of each
+    # cell holding it, so a call only touches the cells it marks.
+    def __init__(self, matrices: Iterable[List[List[int]]]):
+        self.index = defaultdict(list)  # type: Dict[int, List[Tuple[int, int, int]]]
+        self.unmarked_sums = []  # type: List[int]
+        self.line_remaining = array("I")
+        for board, matrix in enumerate(matrices):
+            first_row = len(self.line_remaining)
+            first_column = first_row + len(matrix)
+            self.line_remaining.extend([len(matrix[0])] * len(matrix))
+            self.line_remaining.extend([len(matrix)] * len(matrix[0]))
+            for y, row in enumerate(matrix):
+                for x, number in enumerate(row):
+                    self.index[number].append((board, first_row + y, first_column + x))
+            self.unmarked_sums.append(sum(map(sum, matrix)))
+        self.won = bytearray(len(self.unmarked_sums))
+
+    def __len__(self) -> int:
+        return len(self.unmarked_sums)
+
+    def call_number(self, number: int) -> List[int]:
+        # Returns the boards that win on this call, in board order. A number is only
+        # indexed until it is called, so calling it again does nothing.
+        winners = []
+        remaining = self.line_remaining
+        for board, row, column in self.index.pop(number, ()):
+            self.unmarked_sums[board] -= number
+            remaining[row] -= 1
+            remaining[column] -= 1
+            if not self.won[board] and not (remaining[row] and remaining[column]):
+                self.won[board] = 1
+                winners.append(board)
+        return winners
+
+    def score(self, board: int, multiplier: int) -> int:
+        return self.unmarked_sums[board] * multiplier
+
+    def play(self, numbers: Iterable[int]) -> Iterator[Win]:
+        for number in numbers:
+            for board in self.call_number(number):
+                yield Win(board, number, self.score(board, number))
+
+
+@pytest.fixture
+def aoc_example_text() -> str:
+    return """7,4,9,5,11,17,23,2,0,14,21,24,10,16,13,6,15,25,12,22,18,20,8,19,3,26,1
+
+22 13 17 11  0
+ 8  2 23  4 24
+21  9 14 16  7
+ 6 10  3 18  5
+ 1 12 20 15 19
+
+ 3 15  0  2 22
+ 9 18 13 17  5
+19  8  7 25 23
+20 11 10 24  4
+14 21 16 12  6
+
+14 21 17 24  4
+10 16 15  9 19
+18  8 23 26 20
+22 11 13  6  5
+ 2  0 12  3  7
+"""
+
+
+def test_bingo_engine(aoc_example_text):
+    engine = BingoEngine(parse_bingo_boards_to_matrices(aoc_example_text))
+    wins = list(engine.play(parse_bingo_numbers(aoc_example_text)))
+    assert wins == [Win(2, 24, 4512), Win(0, 16, 2192), Win(1, 13, 1924)]
+
+
+def test_bingo_engine_call_number():
+    engine = BingoEngine([[[1, 2], [3, 4]], [[4, 1], [5, 6]]])
+    assert engine.call_number(1) == []
+    assert engine.call_number(1) == []
+    assert engine.call_number(4) == [1]
+    assert engine.call_number(9) == []
+    assert engine.call_number(3) == [0]
+    assert engine.call_number(2) == []
+    assert (engine.score(0, 10), engine.score(1, 10)) == (0, 110)
+
+
+@pytest.fixture(params=range(5))
+def random_boards(request) -> Tuple[List[int], List[List[List[int]]]]:
+    rng = random.Random(request.param)
+    numbers = rng.sample(range(100), 100)
+    boards = []
+    for _ in range(40):
+        cells = rng.sample(range(100), 25)
+        boards.append([cells[y * 5 : (y + 1) * 5] for y in range(5)])
+    return numbers, boards
+
+
+def simulated_wins(numbers: List[int], matrices: List[List[List[int]]]) -> List[Win]:
+    boards = [BingoBoard(matrix) for matrix in matrices]
+    wins = []
+    for number in numbers:
+        for i, board in enumerate(boards):
+            if not board.is_win():
+                board.call_number(number)
+                if board.is_win():
+                    wins.append(Win(i, number, board.score(number)))
+    return wins
+
+
+def test_bingo_engine_matches_simulation(random_boards):
+    numbers, matrices = random_boards
+    expected = simulated_wins(numbers, matrices)
+    assert list(BingoEngine(matrices).play(numbers)) == expected
+
+
+class WinRanking:
+    # No simulation: a line completes at the latest call of any of its numbers and a
+    # board wins at its earliest completed line, so mapping every cell to its call
+    # rank gives every board's win time at once. Ties keep board order, as in play.
+    def __init__(self, numbers: List[int], matrices: Iterable[List[List[int]]]):
+        self.numbers = numbers
+        self.never = len(numbers)
+        self.ranks = {}  # type: Dict[int, int]
+        for rank, number in enumerate(numbers):
+            self.ranks.setdefault(number, rank)
+        self.matrices = list(matrices)
+        self.times = [self.win_time(matrix) for matrix in self.matrices]
+        winners = (board for board, time in enumerate(self.times) if time < self.never)
+        self.order = sorted(winners, key=self.times.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def cell_ranks(self, matrix: List[List[int]]) -> List[List[int]]:
+        rank = self.ranks.get
+        return [[rank(number, self.never) for number in row] for row in matrix]
+
+    def win_time(self, matrix: List[List[int]]) -> int:
+        ranks = self.cell_ranks(matrix)
+        return min(min(map(max, ranks)), min(map(max, zip(*ranks))))
+
+    def winner(self, k: int) -> Win:
+        # The k-th board to win, counting from 0; negative k counts from the last
+        board = self.order[k]
+        time = self.times[board]
+        matrix = self.matrices[board]
+        cells = zip(chain(*matrix), chain(*self.cell_ranks(matrix)))
+        unmarked = sum(number for number, rank in cells if rank > time)
+        return Win(board, self.numbers[time], unmarked * self.numbers[time])
+
+    def wins(self) -> Iterator[Win]:
+        return (self.winner(k) for k in range(len(self)))
+
+
+def test_win_ranking(aoc_example_text):
+    ranking = WinRanking(
+        parse_bingo_numbers(aoc_example_text),
+        parse_bingo_boards_to_matrices(aoc_example_text),
+    )
+    assert ranking.times == [13, 14, 11]
+    assert ranking.winner(0) == Win(2, 24, 4512)
+    assert ranking.winner(-1) == Win(1, 13, 1924)
+
+
+@pytest.mark.parametrize(
+    "matrices", [[[[1, 2, 3]]], [[[1], [2], [3]]], [[[7]]], [[[1, 2, 3]], [[3], [9]]]]
+)
+def test_win_ranking_on_single_line_boards(matrices):
+    numbers = [2, 1, 3]
+    expected = list(BingoEngine(matrices).play(numbers))
+    assert list(WinRanking(numbers, matrices).wins()) == expected
+
+
+@pytest.mark.parametrize("calls", [10, 40, 100])
+def test_win_ranking_matches_engine(random_boards, calls):
+    numbers, matrices = random_boards
+    numbers = numbers[:calls] + numbers[: calls // 2]
+    expected = list(BingoEngine(matrices).play(numbers))
+    assert list(WinRanking(numbers, matrices).wins()) == expected
+
+
+def test_day4a_without_a_winner(tmp_path):
+    filepath = tmp_path / "day4.txt"
+    filepath.write_text("5,6\n\n1 2\n3 4\n")
+    assert day4a(str(filepath)) is None
+    assert day4b(str(filepath)) is None
+
+
+def read_bingo(filepath: str) -> WinRanking:
     with open(filepath, "r") as file:
         input_string = file.read()
-    bingo_numbers = parse_bingo_numbers(input_string)
-    bingo_boards = [
-        BingoBoard(matrix) for matrix in parse_bingo_boards_to_matrices(input_string)
-    ]
-    for number in bingo_numbers:
-        for board in bingo_boards:
-            board.call_number(number)
-            if board.is_win():
-                return board.score(multiplier=number)
+    return WinRanking(
+        parse_bingo_numbers(input_string), parse_bingo_boards_to_matrices(input_string)
+    )
+
+
+def day4a(filepath: str):
+    ranking = read_bingo(filepath)
+    if len(ranking):
+        return ranking.winner(0).score
 
 
 def day4b(filepath: str):
-    with open(filepath, "r") as file:
-        input_string = file.read()
-    bingo_numbers = parse_bingo_numbers(input_string)
-    bingo_boards = [
-        BingoBoard(matrix) for matrix in parse_bingo_boards_to_matrices(input_string)
-    ]
-    winning_boards = 0
-    for number in bingo_numbers:
-        for board in bingo_boards:
-            if not board.is_win():
-                board.call_number(number)
-                if board.is_win():
-                    winning_boards += 1
-                    if winning_boards == len(bingo_boards):
-                        return board.score(multiplier=number)
+    ranking = read_bingo(filepath)
+    if len(ranking) == len(ranking.matrices):
+        return ranking.winner(-1).score
 
 
 if __name__ == "__main__":
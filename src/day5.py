@@ -1,9 +1,8 @@
 from collections import defaultdict
 from typing import List, NamedTuple, Set, Dict, Optional
 
-import pytest
-
-from src.aoc_helpers import Point
+from src.lazy_pytest import pytest
+from src.aoc_helpers import Point, iter_lines, parse_lines, stream_file
 
 
 class LineSegment(NamedTuple):
@@ -69,11 +68,7 @@ def test_parse_input(input_string, expected):
 
 
 def parse_input(input_string) -> List[LineSegment]:
-    result = []
-    for line in input_string.split("\n"):
-        if line:
-            result.append(LineSegment.from_string(line))
-    return result
+    return list(parse_lines(iter_lines(input_string), LineSegment.from_string))
 
 
 @pytest.mark.parametrize(
@@ -236,21 +231,19 @@ def filter_to_two_plus(
 
 
 def day5a(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        input_string = file.read()
     return len(
         filter_to_two_plus(
-            line_segments=parse_input(input_string), consider_diagonals=False
+            line_segments=stream_file(filepath, LineSegment.from_string),
+            consider_diagonals=False,
         )
     )
 
 
 def day5b(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        input_string = file.read()
     return len(
         filter_to_two_plus(
-            line_segments=parse_input(input_string), consider_diagonals=True
+            line_segments=stream_file(filepath, LineSegment.from_string),
+            consider_diagonals=True,
         )
     )
 
@@ -1,7 +1,7 @@
 from collections import defaultdict
 from typing import Dict
 
-import pytest
+from src.lazy_pytest import pytest
 
 
 @pytest.mark.parametrize(
@@ -2,7 +2,7 @@ import functools
 from statistics import mean
 from typing import List, Tuple, Callable
 
-import pytest
+from src.lazy_pytest import pytest
 
 
 @pytest.mark.parametrize(
@@ -2,7 +2,7 @@ from collections import defaultdict
 from collections import defaultdict
 from typing import List, Dict
 
-import pytest
+from src.lazy_pytest import pytest
 
 
 @pytest.mark.parametrize(
@@ -1,6 +1,8 @@
-from typing import List, Tuple
+from array import array
+from typing import List, Tuple, Iterable
 
-import pytest
+from src.lazy_pytest import pytest
+from src.aoc_helpers import DigitGrid, GridAdjacency
 
 
 @pytest.mark.parametrize(
@@ -18,13 +20,7 @@ def test_parse_input(input_string, expected):
 
 
 def parse_input(input_string: str) -> List[List[int]]:
-    if not input_string:
-        return []
-    lines = input_string.strip().split("\n")
-    result = []
-    for line in lines:
-        result.append([int(x) for x in line.strip()])
-    return result
+    return DigitGrid.from_string(input_string).to_lists(transposed=False)
 
 
 @pytest.mark.parametrize(
@@ -62,21 +58,26 @@ def test_find_low_point_indices(matrix, expected):
 
 
 def find_low_point_indices(matrix: List[List[int]]) -> List[Tuple[int, int]]:
-    result = []
-    for i in range(len(matrix)):
-        line = matrix[i]
-        for j in range(len(line)):
-            if less_than_neighbors(matrix, i, j):
-                result.append((i, j))
-    return result
+    grid = matrix_to_grid(matrix)
+    adjacency = GridAdjacency(grid.width, grid.height)
+    return [divmod(cell, grid.width) for cell in low_point_cells(grid, adjacency)]
+
+
+def matrix_to_grid(matrix: List[List[int]]) -> DigitGrid:
+    width = len(matrix[0]) if matrix else 0
+    return DigitGrid(
+        bytes(height for row in matrix for height in row), width, len(matrix)
+    )
 
 
-def less_than_neighbors(matrix: List[List[int]], i: int, j: int) -> bool:
-    neighbors = get_matrix_neighbors(matrix, i, j)
-    if neighbors:
-        return matrix[i][j] < min(get_matrix_neighbors(matrix, i, j))
-    else:
-        return True
+def low_point_cells(grid: DigitGrid, adjacency: GridAdjacency) -> List[int]:
+    # Off-grid neighbours read as 10, higher than any height, so edges need no checks
+    lowest_neighbors = map(min, *adjacency.gather(grid.cells, fill=10))
+    return [
+        cell
+        for cell, (height, lowest) in enumerate(zip(grid.cells, lowest_neighbors))
+        if height < lowest
+    ]
 
 
 @pytest.mark.parametrize(
@@ -139,26 +140,35 @@ def test_calculate_size_of_basin(matrix, origin, expected):
 
 
 def calculate_size_of_basin(matrix: List[List[int]], origin: Tuple[int, int]) -> int:
-    basin = set()
-    neighbors = [origin]
-    while neighbors:
-        basin.update(neighbors)
-        new_neighbors = []
-        for neighbor in neighbors:
-            candidate_neighbors = set(
-                get_matrix_neighbor_indices(matrix=matrix, i=neighbor[0], j=neighbor[1])
-            )
-            candidate_neighbors -= basin
-            new_neighbors.extend(
-                [
-                    neighbor
-                    for neighbor in candidate_neighbors
-                    if matrix[neighbor[0]][neighbor[1]] < 9
-                ]
-            )
-            basin.update(new_neighbors)
-        neighbors = new_neighbors
-    return len(basin)
+    grid = matrix_to_grid(matrix)
+    adjacency = GridAdjacency(grid.width, grid.height)
+    return basin_sizes(grid, adjacency, [origin[0] * grid.width + origin[1]])[0]
+
+
+def basin_sizes(
+    grid: DigitGrid, adjacency: GridAdjacency, origins: Iterable[int]
+) -> List[int]:
+    # A border of 9s stops the fill at the edge just like a ridge does. Cells are
+    # stamped with their basin's number, so basins never need a visited set each.
+    heights = adjacency.padded(grid.cells, fill=9)
+    steps = adjacency.padded_steps()
+    stamps = array("I", [0]) * len(heights)
+    sizes = []
+    for stamp, origin in enumerate(origins, start=1):
+        start = adjacency.padded_index(origin)
+        stamps[start] = stamp
+        to_visit = [start]
+        size = 0
+        while to_visit:
+            cell = to_visit.pop()
+            size += 1
+            for step in steps:
+                neighbor = cell + step
+                if heights[neighbor] < 9 and stamps[neighbor] != stamp:
+                    stamps[neighbor] = stamp
+                    to_visit.append(neighbor)
+        sizes.append(size)
+    return sizes
 
 
 def test_get_all_basin_sizes():
@@ -166,27 +176,27 @@ def test_get_all_basin_sizes():
 
 
 def get_all_basin_sizes(matrix: List[List[int]]) -> List[int]:
-    return sorted(
-        [
-            calculate_size_of_basin(matrix=matrix, origin=point)
-            for point in find_low_point_indices(matrix)
-        ]
-    )
+    return get_grid_basin_sizes(matrix_to_grid(matrix))
+
+
+def get_grid_basin_sizes(grid: DigitGrid) -> List[int]:
+    adjacency = GridAdjacency(grid.width, grid.height)
+    return sorted(basin_sizes(grid, adjacency, low_point_cells(grid, adjacency)))
 
 
 def day9a(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        matrix = parse_input(file.read())
-    low_points = find_low_points(matrix)
-    return len(low_points) + sum(low_points)
+    with open(filepath, "rb") as file:
+        grid = DigitGrid.from_bytes(file.read())
+    low_points = low_point_cells(grid, GridAdjacency(grid.width, grid.height))
+    return sum(grid.cells[cell] + 1 for cell in low_points)
 
 
 def day9b(filepath: str) -> int:
-    with open(filepath, "r") as file:
-        matrix = parse_input(file.read())
-    basin_sizes = get_all_basin_sizes(matrix)
-    print(f"Basin sizes = {basin_sizes}")
-    return basin_sizes[-1] * basin_sizes[-2] * basin_sizes[-3]
+    with open(filepath, "rb") as file:
+        grid = DigitGrid.from_bytes(file.read())
+    sizes = get_grid_basin_sizes(grid)
+    print(f"Basin sizes = {sizes}")
+    return sizes[-1] * sizes[-2] * sizes[-3]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import logging
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.lazy_pytest import pytest
+
+logger = logging.getLogger(__name__)
+
+
+class Strategy(NamedTuple):
+    name: str
+    func: Callable
+    # Largest problem size this is worth using for; None means any size
+    max_size: Optional[float] = None
+
+
+def eligible_strategies(size: float, strategies: Sequence[Strategy]) -> List[Strategy]:
+    return [s for s in strategies if s.max_size is None or size <= s.max_size]
+
+
+def dispatch(problem: str, size: float, strategies: Sequence[Strategy], *args) -> Any:
+    # Strategies are listed cheapest first. The first one whose max_size admits the
+    # input runs, and if it runs out of stack or memory the next eligible one takes
+    # over, so a size estimate that is off costs time rather than an answer.
+    candidates = eligible_strategies(size, strategies)
+    if not candidates:
+        raise ValueError(f"No strategy for {problem} handles size {size}")
+    for strategy in candidates[:-1]:
+        logger.info("%s: size %s, using %s", problem, size, strategy.name)
+        try:
+            return strategy.func(*args)
+        except (RecursionError, MemoryError) as e:
+            logger.warning(
+                "%s: %s gave up (%r), falling back", problem, strategy.name, e
+            )
+    logger.info("%s: size %s, using %s", problem, size, candidates[-1].name)
+    return candidates[-1].func(*args)
+
+
+@pytest.fixture
+def countdown_strategies() -> Tuple[Strategy, ...]:
+    def recurse(n: int) -> int:
+        return 0 if n == 0 else 1 + recurse(n - 1)
+
+    def count_down(n: int) -> int:
+        return n
+
+    return (
+        Strategy("recursion", recurse, max_size=100000),
+        Strategy("loop", count_down),
+    )
+
+
+@pytest.mark.parametrize(
+    "size, expected",
+    [(10, ["recursion", "loop"]), (100000, ["recursion", "loop"]), (100001, ["loop"])],
+)
+def test_eligible_strategies(countdown_strategies, size, expected):
+    strategies = eligible_strategies(size, countdown_strategies)
+    assert [s.name for s in strategies] == expected
+
+
+def test_dispatch_logs_the_choice(countdown_strategies, caplog):
+    with caplog.at_level(logging.INFO, logger=__name__):
+        assert dispatch("countdown", 10, countdown_strategies, 10) == 10
+    assert "countdown: size 10, using recursion" in caplog.text
+
+
+def test_dispatch_falls_back_when_recursion_runs_out(countdown_strategies, caplog):
+    with caplog.at_level(logging.INFO, logger=__name__):
+        assert dispatch("countdown", 50000, countdown_strategies, 50000) == 50000
+    assert "recursion gave up" in caplog.text
+    assert "using loop" in caplog.text
+
+
+def test_dispatch_needs_an_eligible_strategy(countdown_strategies):
+    with pytest.raises(ValueError):
+        dispatch("countdown", 10**6, countdown_strategies[:1], 10**6)
@@ -0,0 +1,54 @@
+import sys
+from typing import Any, Callable
+
+# Solver modules keep their tests inline, so they decorate functions with
+# pytest.mark / pytest.fixture at import time. Importing pytest just for that costs
+# a couple of hundred milliseconds per run, so outside a pytest session those
+# decorators become no-ops and pytest itself is only imported if something else
+# (pytest.raises, pytest.approx, ...) is actually used.
+
+
+def _identity_decorator(*args, **kwargs) -> Callable:
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+    return lambda func: func
+
+
+class _NoOpMarks:
+    def __getattr__(self, name: str) -> Callable:
+        return _identity_decorator
+
+
+class LazyPytest:
+    def __getattr__(self, name: str) -> Any:
+        real_pytest = sys.modules.get("pytest")
+        if real_pytest is not None:
+            return getattr(real_pytest, name)
+        if name == "mark":
+            return _NoOpMarks()
+        if name == "fixture":
+            return _identity_decorator
+        import pytest
+
+        return getattr(pytest, name)
+
+
+pytest = LazyPytest()
+
+
+def test_lazy_pytest_defers_to_the_real_module_under_pytest():
+    import pytest as real_pytest
+
+    assert pytest.mark is real_pytest.mark
+    assert pytest.fixture is real_pytest.fixture
+
+
+def test_no_op_decorators_return_the_function():
+    def func():
+        pass
+
+    marks = _NoOpMarks()
+    assert marks.parametrize("a", [1, 2])(func) is func
+    assert _identity_decorator(func) is func
+    assert _identity_decorator()(func) is func
+    assert _identity_decorator(scope="module")(func) is func
@@ -0,0 +1,148 @@
+import io
+import signal
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.lazy_pytest import pytest
+
+PROFILERS = ("cprofile", "sample")
+DEFAULT_PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+DEFAULT_TOP = 25
+
+
+def frame_label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_name}"
+
+
+class SamplingProfiler:
+    # Samples the Python stack on SIGPROF, i.e. every `interval` seconds of CPU time
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks = Counter()  # type: Counter
+        self._root_code = None
+
+    def _sample(self, signum, frame):
+        stack = []
+        while frame is not None and frame.f_code is not self._root_code:
+            stack.append(frame_label(frame))
+            frame = frame.f_back
+        # Only count samples taken inside the profiled call
+        if frame is not None and stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def profile_call(self, func: Callable, *args) -> Any:
+        self._root_code = SamplingProfiler.profile_call.__code__
+        previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        try:
+            return func(*args)
+        finally:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous_handler)
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{stack} {count}\n" for stack, count in sorted(self.stacks.items())
+        )
+
+    def function_counts(self) -> Dict[str, Tuple[int, int]]:
+        inclusive = Counter()  # type: Counter
+        exclusive = Counter()  # type: Counter
+        for stack, count in self.stacks.items():
+            functions = stack.split(";")
+            exclusive[functions[-1]] += count
+            for function in set(functions):
+                inclusive[function] += count
+        return {
+            function: (inclusive[function], exclusive[function])
+            for function in inclusive
+        }
+
+    def summary(self, top: int = DEFAULT_TOP) -> str:
+        total = sum(self.stacks.values()) or 1
+        rows = sorted(self.function_counts().items(), key=lambda item: -item[1][0])
+        lines = [f"{'cumulative':>10} {'self':>6}  function ({total} samples)"]
+        for function, (inclusive, exclusive) in rows[:top]:
+            lines.append(
+                f"{100 * inclusive / total:9.1f}% {100 * exclusive / total:5.1f}%  {function}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def cprofile_call(func: Callable, *args) -> Tuple[Any, "pstats.Stats"]:
+    # Imported here so that unprofiled runs do not pay for cProfile at startup
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args)
+    return result, pstats.Stats(profiler)
+
+
+def cprofile_summary(stats: "pstats.Stats", top: int = DEFAULT_TOP) -> str:
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(top)
+    return stream.getvalue()
+
+
+def profile_call(
+    func: Callable,
+    args: Tuple,
+    profiler: str,
+    output_stem: Path,
+    top: int = DEFAULT_TOP,
+) -> Any:
+    output_stem.parent.mkdir(parents=True, exist_ok=True)
+    if profiler == "cprofile":
+        result, stats = cprofile_call(func, *args)
+        stats.dump_stats(str(output_stem.with_suffix(".pstats")))
+        summary = cprofile_summary(stats, top)
+    elif profiler == "sample":
+        sampler = SamplingProfiler()
+        result = sampler.profile_call(func, *args)
+        output_stem.with_suffix(".collapsed").write_text(sampler.collapsed())
+        summary = sampler.summary(top)
+    else:
+        raise ValueError(f"Unknown profiler {profiler}, expected one of {PROFILERS}")
+    output_stem.with_suffix(".txt").write_text(summary)
+    return result
+
+
+def busy_leaf(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def busy_root(n: int) -> List[int]:
+    return [busy_leaf(n) for _ in range(20)]
+
+
+def test_sampling_profiler_collapses_stacks():
+    sampler = SamplingProfiler(interval=0.0005)
+    assert sampler.profile_call(busy_root, 20000) == [busy_leaf(20000)] * 20
+    collapsed = sampler.collapsed()
+    assert collapsed
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.startswith(f"{__name__}.busy_root")
+        assert int(count) > 0
+    assert f";{__name__}.busy_leaf" in collapsed
+    inclusive, _ = sampler.function_counts()[f"{__name__}.busy_root"]
+    assert inclusive == sum(sampler.stacks.values())
+
+
+@pytest.mark.parametrize(
+    "profiler, suffixes",
+    [("cprofile", {".pstats", ".txt"}), ("sample", {".collapsed", ".txt"})],
+)
+def test_profile_call_writes_output(tmp_path, profiler, suffixes):
+    result = profile_call(busy_root, (20000,), profiler, tmp_path / "out" / "day0a")
+    assert result == [busy_leaf(20000)] * 20
+    assert {path.suffix for path in (tmp_path / "out").iterdir()} == suffixes
+    assert "busy_leaf" in (tmp_path / "out" / "day0a.txt").read_text()
+
+
+def test_profile_call_rejects_unknown_profiler(tmp_path):
+    with pytest.raises(ValueError):
+        profile_call(busy_root, (1,), "perf", tmp_path / "day0a")
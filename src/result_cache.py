@@ -0,0 +1,230 @@
+import functools
+import hashlib
+import inspect
+import json
+from pathlib import Path
+from typing import Any, Callable, List, Set, Tuple, Union
+
+from src.lazy_pytest import pytest
+
+REPO_ROOT = Path(__file__).parent.parent
+LOCAL_PACKAGE = "src"
+DEFAULT_CACHE_PATH = REPO_ROOT / ".aoc_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 256
+# A logical clock rather than wall time, so back-to-back uses never tie
+NEXT_TICK = "(SELECT COALESCE(MAX(last_used), 0) + 1 FROM results)"
+
+
+def file_digest(filepath: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def module_path(module: str, root: Path) -> Path:
+    path = root.joinpath(*module.split("."))
+    return path / "__init__.py" if path.is_dir() else path.with_suffix(".py")
+
+
+def local_imports(source_file: Path, root: Path = REPO_ROOT) -> List[Path]:
+    # Every src.* module the file imports, at the top or lazily inside a function
+    # Imported here so that runs without --cache do not pay for ast
+    import ast
+
+    modules = set()
+    for node in ast.walk(ast.parse(source_file.read_bytes())):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.add(node.module)
+            if node.module == LOCAL_PACKAGE:
+                modules.update(f"{node.module}.{alias.name}" for alias in node.names)
+    local = [module_path(m, root) for m in modules if m.split(".")[0] == LOCAL_PACKAGE]
+    return [path for path in local if path.exists()]
+
+
+def source_files(source_file: Path, root: Path = REPO_ROOT) -> List[Path]:
+    seen = set()  # type: Set[Path]
+    pending = [source_file.resolve()]
+    while pending:
+        path = pending.pop()
+        if path not in seen:
+            seen.add(path)
+            pending.extend(p.resolve() for p in local_imports(path, root))
+    return sorted(seen)
+
+
+@functools.lru_cache(maxsize=None)
+def source_digest(source_file: str, root: Path = REPO_ROOT) -> str:
+    # A fix in a helper module the solver imports must invalidate its answers too
+    digest = hashlib.sha256()
+    for path in source_files(Path(source_file), root):
+        digest.update(file_digest(path).encode())
+    return digest.hexdigest()
+
+
+def argument_digest(argument: Any) -> str:
+    # Input paths are keyed on what the file holds, not on where it lives
+    if isinstance(argument, (str, Path)) and Path(argument).is_file():
+        return file_digest(argument)
+    return repr(argument)
+
+
+def cache_key(func: Callable, args: Tuple) -> str:
+    solver_version = source_digest(inspect.getfile(func))
+    arguments = ",".join(argument_digest(argument) for argument in args)
+    return f"{func.__module__}.{func.__qualname__}:{solver_version}:{arguments}"
+
+
+class ResultCache:
+    def __init__(
+        self,
+        path: Union[str, Path] = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        # Imported here so that runs without --cache do not pay for sqlite3
+        import sqlite3
+
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(str(path), timeout=30)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key TEXT PRIMARY KEY, answer TEXT NOT NULL, last_used INTEGER NOT NULL)"
+            )
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        row = self._connection.execute(
+            "SELECT answer FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        with self._connection:
+            self._connection.execute(
+                f"UPDATE results SET last_used = {NEXT_TICK} WHERE key = ?", (key,)
+            )
+        return True, json.loads(row[0])
+
+    def put(self, key: str, answer: Any):
+        try:
+            encoded = json.dumps(answer)
+        except TypeError:
+            return
+        with self._connection:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO results VALUES (?, ?, {NEXT_TICK})",
+                (key, encoded),
+            )
+            self._connection.execute(
+                "DELETE FROM results WHERE key NOT IN "
+                "(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = cache_key(func, args)
+            found, answer = self.get(key)
+            if found:
+                self.hits += 1
+                return answer
+            self.misses += 1
+            answer = func(*args)
+            self.put(key, answer)
+            return answer
+
+        return wrapper
+
+
+def test_result_cache_hits_and_misses(tmp_path):
+    calls = []
+
+    def count_lines(filepath: str) -> int:
+        calls.append(filepath)
+        with open(filepath, "r") as file:
+            return len(file.read().split())
+
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("1\n2\n3")
+    with ResultCache(tmp_path / "cache.sqlite3") as cache:
+        cached_count_lines = cache(count_lines)
+        assert cached_count_lines(str(input_file)) == 3
+        assert cached_count_lines(str(input_file)) == 3
+        assert len(calls) == 1
+        assert cache.stats() == {"cache_hits": 1, "cache_misses": 1}
+
+        input_file.write_text("1\n2\n3\n4")
+        assert cached_count_lines(str(input_file)) == 4
+        assert cache.stats() == {"cache_hits": 1, "cache_misses": 2}
+
+
+def test_result_cache_persists(tmp_path):
+    with ResultCache(tmp_path / "cache.sqlite3") as cache:
+        cache.put("key", "#..#\n.##.")
+    with ResultCache(tmp_path / "cache.sqlite3") as cache:
+        assert cache.get("key") == (True, "#..#\n.##.")
+        assert cache.get("other") == (False, None)
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    with ResultCache(tmp_path / "cache.sqlite3", max_entries=2) as cache:
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        assert len(cache) == 2
+        assert cache.get("b") == (False, None)
+        assert cache.get("a") == (True, 1)
+        assert cache.get("c") == (True, 3)
+
+
+def test_result_cache_skips_unserialisable_answers(tmp_path):
+    with ResultCache(tmp_path / "cache.sqlite3") as cache:
+        cache.put("key", {1, 2})
+        assert len(cache) == 0
+
+
+def test_source_files_follow_local_imports():
+    day15 = Path(__file__).parent / "day15.py"
+    names = {path.name for path in source_files(day15)}
+    assert {"day15.py", "aoc_helpers.py", "lazy_pytest.py"} <= names
+    assert "result_cache.py" not in names
+
+
+def test_source_digest_changes_with_imported_modules(tmp_path):
+    package = tmp_path / LOCAL_PACKAGE
+    package.mkdir()
+    (package / "solver.py").write_text("from src.helper import f\nimport os\n")
+    (package / "helper.py").write_text("def f():\n    from src import leaf\n")
+    (package / "leaf.py").write_text("X = 1\n")
+    solver = str(package / "solver.py")
+    digest = source_digest.__wrapped__
+    before = digest(solver, tmp_path)
+    assert digest(solver, tmp_path) == before
+    (package / "leaf.py").write_text("X = 2\n")
+    assert digest(solver, tmp_path) != before
+
+
+@pytest.mark.parametrize("argument", [7, "not a file", None])
+def test_argument_digest_of_non_files(argument):
+    assert argument_digest(argument) == repr(argument)
@@ -0,0 +1,568 @@
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import logging
+import os
+import resource
+import signal
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Any, Optional, Sequence, Iterator
+
+from src.lazy_pytest import pytest
+from src.profiling import PROFILERS, DEFAULT_PROFILE_DIR, DEFAULT_TOP, profile_call
+from src.result_cache import (
+    ResultCache,
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_ENTRIES,
+    source_digest,
+)
+
+SRC_DIR = Path(__file__).parent
+DEFAULT_INPUT_DIR = SRC_DIR.parent / "puzzle_input"
+PARTS = ("a", "b")
+
+# Day 1 predates any naming convention: its part B solver is called day_2a.
+LEGACY_PART_NAMES = {1: {"a": "day_1a", "b": "day_2a"}}
+
+# Generous enough for a loaded CI box; pulling pytest or sqlite3 in at startup is not
+IMPORT_BUDGET_S = 0.25
+STARTUP_BUDGET_S = 1.0
+
+DAY1_EXAMPLE = "199\n200\n208\n210\n200\n207\n240\n269\n260\n263"
+
+
+class PartResult(NamedTuple):
+    day: int
+    part: str
+    answer: Any
+    wall_time_s: float
+    # None where the process peak cannot be reset between parts
+    peak_rss_kb: Optional[int]
+    tracemalloc_peak_bytes: Optional[int]
+    error: Optional[str] = None
+    cache_hit: Optional[bool] = None
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+
+def available_days() -> List[int]:
+    return sorted(int(path.stem[3:]) for path in SRC_DIR.glob("day[0-9]*.py"))
+
+
+def candidate_part_names(day: int, part: str) -> List[str]:
+    legacy = LEGACY_PART_NAMES.get(day, {}).get(part)
+    candidates = [f"part_{part}", f"day{day}{part}", f"day_{day}{part}"]
+    return ([legacy] if legacy else []) + candidates
+
+
+@pytest.mark.parametrize(
+    "day, part, expected",
+    [
+        (1, "a", "day_1a"),
+        (1, "b", "day_2a"),
+        (2, "b", "day_2b"),
+        (6, "a", "day6a"),
+        (7, "b", "day7b"),
+        (12, "a", "part_a"),
+        (21, "b", "part_b"),
+    ],
+)
+def test_find_part_callable(day, part, expected):
+    assert find_part_callable(day, part).__name__ == expected
+
+
+def find_part_callable(day: int, part: str) -> Callable:
+    module = importlib.import_module(f"src.day{day}")
+    for name in candidate_part_names(day, part):
+        solver = getattr(module, name, None)
+        if callable(solver):
+            return solver
+    raise LookupError(f"No solver found for day {day} part {part}")
+
+
+def input_path(day: int, input_dir: Path = DEFAULT_INPUT_DIR) -> Path:
+    return input_dir / f"day{day}.txt"
+
+
+def call_solver(solver: Callable, filepath: Path) -> Any:
+    if inspect.signature(solver).parameters:
+        return solver(str(filepath))
+    return solver()
+
+
+class ProfileOptions(NamedTuple):
+    profiler: str
+    output_dir: Path = DEFAULT_PROFILE_DIR
+    top: int = DEFAULT_TOP
+
+
+def call_solver_profiled(
+    solver: Callable, filepath: Path, options: ProfileOptions, output_name: str
+) -> Any:
+    return profile_call(
+        call_solver,
+        (solver, filepath),
+        profiler=options.profiler,
+        output_stem=options.output_dir / output_name,
+        top=options.top,
+    )
+
+
+def peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def reset_peak_rss() -> bool:
+    # ru_maxrss is a high-water mark over the whole process, so without a reset every
+    # part would inherit the peak of whatever ran before it. Linux can drop the mark
+    # back to the current RSS, which still counts memory earlier parts left resident;
+    # elsewhere there is no per-part peak to report.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def time_limit(seconds: Optional[float]):
+    if not seconds:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise SolverTimeout(f"Timed out after {seconds}s")
+
+    previous_handler = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def test_run_part(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    result = run_part(day=1, part="a", input_dir=tmp_path)
+    assert (result.day, result.part, result.answer) == (1, "a", 7)
+    assert result.wall_time_s >= 0
+    assert result.peak_rss_kb is None or result.peak_rss_kb > 0
+    assert result.tracemalloc_peak_bytes > 0
+
+
+def test_run_part_peak_rss_ignores_earlier_parts(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    ballast = b"x" * (64 << 20)
+    del ballast
+    peak_with_ballast = peak_rss_kb()
+    result = run_part(day=1, part="a", input_dir=tmp_path, trace_memory=False)
+    if reset_peak_rss():
+        assert result.peak_rss_kb < peak_with_ballast - (32 << 10)
+    else:
+        assert result.peak_rss_kb is None
+
+
+def test_run_part_times_only_the_solver(tmp_path, monkeypatch):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    slow_import = find_part_callable
+
+    def find_slowly(day, part):
+        time.sleep(0.2)
+        return slow_import(day, part)
+
+    monkeypatch.setattr(f"{__name__}.find_part_callable", find_slowly)
+    result = run_part(day=1, part="a", input_dir=tmp_path, trace_memory=False)
+    assert result.answer == 7
+    assert result.wall_time_s < 0.2
+
+
+def test_run_part_reports_a_missing_solver():
+    result = run_part(day=99, part="a", trace_memory=False)
+    assert result.error.startswith("ModuleNotFoundError")
+    assert (result.wall_time_s, result.peak_rss_kb) == (0.0, None)
+
+
+def test_run_part_without_tracemalloc(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    result = run_part(day=1, part="b", input_dir=tmp_path, trace_memory=False)
+    assert result.answer == 5
+    assert result.tracemalloc_peak_bytes is None
+
+
+def test_run_part_timeout():
+    result = run_part(day=17, part="a", trace_memory=False, timeout=0.05)
+    assert result.answer is None
+    assert result.error == "SolverTimeout: Timed out after 0.05s"
+
+
+def test_run_parts_reports_failures(tmp_path):
+    (tmp_path / "day6.txt").write_text("3,4,3,1,2")
+    results = list(run_parts(days=[1, 6], input_dir=tmp_path, trace_memory=False))
+    assert [r.error.split(":")[0] for r in results[:2]] == ["FileNotFoundError"] * 2
+    assert [(r.answer, r.error) for r in results[2:]] == [
+        (5934, None),
+        (26984457539, None),
+    ]
+
+
+def test_run_part_with_cache(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    cache_path = tmp_path / "cache.sqlite3"
+    first = run_part(day=1, part="a", input_dir=tmp_path, cache_path=cache_path)
+    second = run_part(day=1, part="a", input_dir=tmp_path, cache_path=cache_path)
+    assert (first.answer, first.cache_hit) == (7, False)
+    assert (second.answer, second.cache_hit) == (7, True)
+
+
+def test_run_part_profiled(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    profile = ProfileOptions("cprofile", output_dir=tmp_path / "profiles")
+    result = run_part(day=1, part="a", input_dir=tmp_path, profile=profile)
+    assert result.answer == 7
+    assert "count_increase" in (tmp_path / "profiles" / "day1a.txt").read_text()
+    assert (tmp_path / "profiles" / "day1a.pstats").exists()
+
+
+def run_part(
+    day: int,
+    part: str,
+    input_dir: Path = DEFAULT_INPUT_DIR,
+    trace_memory: bool = True,
+    timeout: Optional[float] = None,
+    cache_path: Optional[Path] = None,
+    cache_size: int = DEFAULT_MAX_ENTRIES,
+    profile: Optional[ProfileOptions] = None,
+) -> PartResult:
+    filepath = input_path(day, input_dir)
+    cache = ResultCache(cache_path, max_entries=cache_size) if cache_path else None
+    answer = None
+    error = None
+    wall_time = 0.0
+    tracemalloc_peak = None
+    rss_is_per_part = False
+    # A failing part is reported in its row, as run_parts_parallel does, rather
+    # than ending the whole run
+    try:
+        # Resolved before the clock starts, so importing the day's module and hashing
+        # its sources is not charged to whichever part happens to run first
+        try:
+            solver = find_part_callable(day, part)
+            if cache is not None:
+                source_digest(inspect.getfile(solver))
+                solver = cache(solver)
+        except Exception as e:
+            solver = None
+            error = f"{type(e).__name__}: {e}"
+        if solver is not None:
+            rss_is_per_part = reset_peak_rss()
+            if trace_memory:
+                tracemalloc.start()
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                try:
+                    with time_limit(timeout):
+                        if profile:
+                            answer = call_solver_profiled(
+                                solver, filepath, profile, f"day{day}{part}"
+                            )
+                        else:
+                            answer = call_solver(solver, filepath)
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                wall_time = time.perf_counter() - start
+            if trace_memory:
+                tracemalloc_peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if cache is not None:
+            cache.close()
+    return PartResult(
+        day=day,
+        part=part,
+        answer=answer,
+        wall_time_s=wall_time,
+        peak_rss_kb=peak_rss_kb() if rss_is_per_part else None,
+        tracemalloc_peak_bytes=tracemalloc_peak,
+        error=error,
+        cache_hit=bool(cache.hits) if cache is not None else None,
+    )
+
+
+def run_parts(
+    days: Sequence[int],
+    parts: Sequence[str] = PARTS,
+    input_dir: Path = DEFAULT_INPUT_DIR,
+    trace_memory: bool = True,
+    timeout: Optional[float] = None,
+    cache_path: Optional[Path] = None,
+    cache_size: int = DEFAULT_MAX_ENTRIES,
+    profile: Optional[ProfileOptions] = None,
+) -> Iterator[PartResult]:
+    for day in days:
+        for part in parts:
+            yield run_part(
+                day=day,
+                part=part,
+                input_dir=input_dir,
+                trace_memory=trace_memory,
+                timeout=timeout,
+                cache_path=cache_path,
+                cache_size=cache_size,
+                profile=profile,
+            )
+
+
+def test_run_parts_parallel_matches_serial(tmp_path):
+    (tmp_path / "day1.txt").write_text(DAY1_EXAMPLE)
+    (tmp_path / "day6.txt").write_text("3,4,3,1,2")
+    kwargs = dict(days=[6, 1], input_dir=tmp_path, trace_memory=False)
+    serial = [(r.day, r.part, r.answer) for r in run_parts(**kwargs)]
+    parallel = [
+        (r.day, r.part, r.answer) for r in run_parts_parallel(workers=2, **kwargs)
+    ]
+    assert (
+        parallel
+        == serial
+        == [
+            (6, "a", 5934),
+            (6, "b", 26984457539),
+            (1, "a", 7),
+            (1, "b", 5),
+        ]
+    )
+
+
+def test_run_parts_parallel_reports_failures(tmp_path):
+    results = list(
+        run_parts_parallel(days=[1], parts=["a"], input_dir=tmp_path, workers=1)
+    )
+    assert results[0].answer is None
+    assert results[0].error.startswith("FileNotFoundError")
+
+
+def test_run_parts_parallel_reports_lost_workers():
+    # The task cannot even be sent to a worker, so no run_part fills in the row
+    unpicklable_dir = Path(__file__).parent, lambda: None
+    results = list(
+        run_parts_parallel(days=[1], parts=["a"], input_dir=unpicklable_dir, workers=1)
+    )
+    assert results[0].error is not None
+    assert (results[0].answer, results[0].peak_rss_kb) == (None, None)
+
+
+def run_parts_parallel(
+    days: Sequence[int],
+    parts: Sequence[str] = PARTS,
+    input_dir: Path = DEFAULT_INPUT_DIR,
+    trace_memory: bool = True,
+    timeout: Optional[float] = None,
+    cache_path: Optional[Path] = None,
+    cache_size: int = DEFAULT_MAX_ENTRIES,
+    profile: Optional[ProfileOptions] = None,
+    workers: Optional[int] = None,
+) -> Iterator[PartResult]:
+    from concurrent.futures import ProcessPoolExecutor
+
+    tasks = [(day, part) for day in days for part in parts]
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(
+                run_part,
+                day,
+                part,
+                input_dir,
+                trace_memory,
+                timeout,
+                cache_path,
+                cache_size,
+                profile,
+            )
+            for day, part in tasks
+        ]
+        # Yield in submission order so the output is deterministic
+        for (day, part), future in zip(tasks, futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield PartResult(
+                    day=day,
+                    part=part,
+                    answer=None,
+                    wall_time_s=0.0,
+                    peak_rss_kb=None,
+                    tracemalloc_peak_bytes=None,
+                    error=f"{type(e).__name__}: {e}",
+                )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Run Advent of Code solvers, reporting time and memory as JSON lines"
+    )
+    parser.add_argument(
+        "days", nargs="*", type=int, help="Days to run (default: every day)"
+    )
+    parser.add_argument("--parts", nargs="+", choices=PARTS, default=list(PARTS))
+    parser.add_argument("--input-dir", type=Path, default=DEFAULT_INPUT_DIR)
+    parser.add_argument(
+        "--no-tracemalloc",
+        dest="trace_memory",
+        action="store_false",
+        help="Skip tracemalloc, which slows allocation-heavy solvers down",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run parts in a process pool of this size (0 means one per CPU)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, help="Abandon any single part after this many seconds"
+    )
+    parser.add_argument(
+        "--cache",
+        dest="cache_path",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_CACHE_PATH,
+        help=f"Reuse answers stored in this SQLite file (default: {DEFAULT_CACHE_PATH})",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Evict least recently used answers beyond this many",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILERS,
+        default=os.environ.get("AOC_PROFILE") or None,
+        help="Profile each part: cprofile writes .pstats, sample writes flamegraph-ready"
+        " .collapsed stacks; both write a top-N .txt summary (default: $AOC_PROFILE)",
+    )
+    parser.add_argument("--profile-dir", type=Path, default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_TOP)
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Log which implementation each solver picked for its input size",
+    )
+    args = parser.parse_args(argv)
+    # A default taken from the environment never goes through the choices check
+    if args.profile is not None and args.profile not in PROFILERS:
+        parser.error(
+            f"AOC_PROFILE={args.profile!r} is not a profiler, choose from "
+            f"{', '.join(PROFILERS)}"
+        )
+    return args
+
+
+@pytest.mark.parametrize("environ, expected", [("", None), ("sample", "sample")])
+def test_parse_args_profile_from_environment(monkeypatch, environ, expected):
+    monkeypatch.setenv("AOC_PROFILE", environ)
+    assert parse_args(["1"]).profile == expected
+    assert parse_args(["1", "--profile", "cprofile"]).profile == "cprofile"
+
+
+def test_parse_args_rejects_unknown_profile_from_environment(monkeypatch, capsys):
+    monkeypatch.setenv("AOC_PROFILE", "perf")
+    with pytest.raises(SystemExit):
+        parse_args(["1"])
+    assert "AOC_PROFILE='perf' is not a profiler" in capsys.readouterr().err
+
+
+def import_times(modules: Sequence[str]) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=SRC_DIR.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    times = {}
+    for line in completed.stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def test_runner_imports_stay_light():
+    times = import_times(["src.runner", "src.day1"])
+    assert "pytest" not in times
+    assert "sqlite3" not in times
+    assert "concurrent.futures" not in times
+    assert "src.day2" not in times
+    assert times["src.runner"] < IMPORT_BUDGET_S
+
+
+def test_cold_startup_within_budget():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "src.runner", "--help"],
+        cwd=SRC_DIR.parent,
+        capture_output=True,
+        check=True,
+    )
+    assert time.perf_counter() - start < STARTUP_BUDGET_S
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    kwargs = dict(
+        days=args.days or available_days(),
+        parts=args.parts,
+        input_dir=args.input_dir,
+        trace_memory=args.trace_memory,
+        timeout=args.timeout,
+        cache_path=args.cache_path,
+        cache_size=args.cache_size,
+        profile=(
+            ProfileOptions(args.profile, args.profile_dir, args.profile_top)
+            if args.profile
+            else None
+        ),
+    )
+    if args.workers == 1:
+        results = run_parts(**kwargs)
+    else:
+        results = run_parts_parallel(workers=args.workers or os.cpu_count(), **kwargs)
+    cache_counts = {True: 0, False: 0}
+    for result in results:
+        print(result.to_json(), flush=True)
+        if result.cache_hit is not None:
+            cache_counts[result.cache_hit] += 1
+    if args.cache_path:
+        print(
+            json.dumps(
+                {"cache_hits": cache_counts[True], "cache_misses": cache_counts[False]}
+            ),
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import pytest
+from src.lazy_pytest import pytest
 
 
 @pytest.mark.parametrize("input_string, expected", [])